@@ -14,4 +14,5 @@ export interface UserConfig {
     ftx_mode: string,
     qth_string: string,
     rig_if_type: string,
+    rig_poll_ms: number,
 }
@@ -0,0 +1,7 @@
+// the detail of the 'rigstate' window event sent when the rig's frequency or
+// mode changes
+export interface RigState {
+    freq: string,   // kHz, same as the spots
+    mode: string,   // mode string from the rig (USB, CW-U, ...)
+    band: number,   // Bands value
+}
@@ -25,7 +25,17 @@ export interface SpotRow {
     loc_hunts: number,
     loc_total: number,
     is_qrt: boolean,
+    distance: number,
+    bearing: number,
     act_cmts: string,
     cw_wpm: number,
     spot_source: string
 };
+
+export interface SpotFeed {
+    rev: number,
+    base: number,
+    full: boolean,
+    spots: SpotRow[],
+    removed: number[]
+};
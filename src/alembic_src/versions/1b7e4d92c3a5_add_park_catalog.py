@@ -0,0 +1,39 @@
+"""add park catalog
+
+Revision ID: 1b7e4d92c3a5
+Revises: af395801ad41
+Create Date: 2026-10-18 09:12:41.274310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from sqlalchemy.engine.reflection import Inspector
+
+conn = op.get_bind()
+inspector = Inspector.from_engine(conn)
+tables = inspector.get_table_names()
+
+# revision identifiers, used by Alembic.
+revision: str = '1b7e4d92c3a5'
+down_revision: Union[str, None] = 'af395801ad41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# table to track which locations have been loaded into the parks table
+def upgrade() -> None:
+    # the model creates the table on import. wrap in a check
+    if "park_catalog" not in tables:
+        op.create_table("park_catalog",
+            sa.Column("location", sa.String, primary_key=True),
+            sa.Column("parks", sa.Integer),
+            sa.Column("updated", sa.TIMESTAMP,
+                      server_default=sa.func.current_timestamp())
+            )
+
+
+def downgrade() -> None:
+    op.drop_table("park_catalog")
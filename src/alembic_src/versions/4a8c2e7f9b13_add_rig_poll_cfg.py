@@ -0,0 +1,26 @@
+"""add rig poll cfg
+
+Revision ID: 4a8c2e7f9b13
+Revises: 9d3e6b5a1c72
+Create Date: 2026-10-18 15:12:36.418902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4a8c2e7f9b13'
+down_revision: Union[str, None] = '9d3e6b5a1c72'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("config", sa.Column("rig_poll_ms", sa.Integer, server_default="1000"))
+
+
+def downgrade() -> None:
+    op.drop_column("config", "rig_poll_ms")
@@ -0,0 +1,40 @@
+"""add indexes
+
+Revision ID: 7c2f9a1d4e68
+Revises: 1b7e4d92c3a5
+Create Date: 2026-10-18 10:02:17.551832
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2f9a1d4e68'
+down_revision: Union[str, None] = '1b7e4d92c3a5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# name, table, columns. the models declare these too, so a new db will
+# already have them
+indexes = [
+    ('ix_qsos_call_sig_info_time_on', 'qsos', ['call', 'sig_info', 'time_on']),
+    ('ix_qsos_sig_info', 'qsos', ['sig_info']),
+    ('ix_qsos_time_on', 'qsos', ['time_on']),
+    ('ix_parks_reference', 'parks', ['reference']),
+    ('ix_spots_activator_reference', 'spots', ['activator', 'reference']),
+    ('ix_comments_activator_park', 'comments', ['activator', 'park']),
+    ('ix_activators_callsign', 'activators', ['callsign']),
+    ('ix_locations_descriptor', 'locations', ['descriptor']),
+]
+
+
+def upgrade() -> None:
+    for name, table, cols in indexes:
+        op.create_index(name, table, cols, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name, table, _ in indexes:
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,46 @@
+"""unique park reference
+
+Revision ID: 9d3e6b5a1c72
+Revises: f2c4b8e61d09
+Create Date: 2026-10-18 14:31:42.803516
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d3e6b5a1c72'
+down_revision: Union[str, None] = 'f2c4b8e61d09'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# keep one row per reference: the one with park data if there is one, else
+# the oldest. it gets the highest hunt count of the duplicates
+DEDUPE_SQL = [
+    """UPDATE parks SET hunts = (
+        SELECT MAX(p.hunts) FROM parks p
+        WHERE p.reference = parks.reference)
+    WHERE reference IN (
+        SELECT reference FROM parks GROUP BY reference HAVING COUNT(*) > 1);""",
+    """DELETE FROM parks WHERE id != (
+        SELECT p.id FROM parks p
+        WHERE p.reference = parks.reference
+        ORDER BY p.name IS NULL, p.id
+        LIMIT 1);""",
+]
+
+
+def upgrade() -> None:
+    for sql in DEDUPE_SQL:
+        op.execute(sa.text(sql))
+
+    op.drop_index('ix_parks_reference', table_name='parks', if_exists=True)
+    op.create_index('ix_parks_reference', 'parks', ['reference'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_parks_reference', table_name='parks')
+    op.create_index('ix_parks_reference', 'parks', ['reference'])
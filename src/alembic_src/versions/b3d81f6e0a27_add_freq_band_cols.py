@@ -0,0 +1,64 @@
+"""add numeric freq and band columns
+
+Revision ID: b3d81f6e0a27
+Revises: 7c2f9a1d4e68
+Create Date: 2026-10-18 10:41:53.102984
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3d81f6e0a27'
+down_revision: Union[str, None] = '7c2f9a1d4e68'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# band value and edges in kHz at the time of this migration. see bands.py
+band_limits = [
+    (1, 1800.0, 2000.0),
+    (2, 3500.0, 4000.0),
+    (3, 5330.0, 5410.0),
+    (4, 7000.0, 7300.0),
+    (5, 10100.0, 10150.0),
+    (6, 14000.0, 14350.0),
+    (7, 18068.0, 18168.0),
+    (8, 21000.0, 21450.0),
+    (9, 24890.0, 24990.0),
+    (10, 28000.0, 29700.0),
+    (11, 50000.0, 54000.0),
+    (12, 144_000.0, 148_000.0),
+    (13, 219_000.0, 225_000.0),
+    (14, 420_000.0, 450_000.0),
+    (15, 902_000.0, 928_000.0),
+    (16, 1_270_000.0, 1_300_000.0),
+]
+
+
+def upgrade() -> None:
+    op.add_column("qsos", sa.Column("freq_khz", sa.Float, nullable=True))
+    op.add_column("qsos", sa.Column("band", sa.Integer, nullable=True))
+    op.add_column("spots", sa.Column("freq_khz", sa.Float, nullable=True))
+    op.add_column("spots", sa.Column("band", sa.Integer, nullable=True))
+    op.create_index("ix_qsos_band", "qsos", ["band"], if_not_exists=True)
+    op.create_index("ix_spots_band", "spots", ["band"], if_not_exists=True)
+
+    # fill in the existing qsos
+    op.execute(
+        "UPDATE qsos SET freq_khz = CAST(NULLIF(TRIM(freq), '') AS FLOAT);")
+    cases = " ".join(
+        f"WHEN freq_khz > {lo} AND freq_khz < {hi} THEN {b}"
+        for b, lo, hi in band_limits)
+    op.execute(f"UPDATE qsos SET band = CASE {cases} ELSE 0 END;")
+
+
+def downgrade() -> None:
+    op.drop_index("ix_qsos_band", table_name="qsos", if_exists=True)
+    op.drop_index("ix_spots_band", table_name="spots", if_exists=True)
+    op.drop_column("qsos", "freq_khz")
+    op.drop_column("qsos", "band")
+    op.drop_column("spots", "freq_khz")
+    op.drop_column("spots", "band")
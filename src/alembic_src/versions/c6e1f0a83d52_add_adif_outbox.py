@@ -0,0 +1,43 @@
+"""add adif outbox table
+
+Revision ID: c6e1f0a83d52
+Revises: 4a8c2e7f9b13
+Create Date: 2026-10-18 15:47:20.163884
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from sqlalchemy.engine.reflection import Inspector
+
+conn = op.get_bind()
+inspector = Inspector.from_engine(conn)
+tables = inspector.get_table_names()
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6e1f0a83d52'
+down_revision: Union[str, None] = '4a8c2e7f9b13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # the model creates the table on import. wrap in a check
+    if "adif_outbox" not in tables:
+        op.create_table("adif_outbox",
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("msg", sa.String, nullable=False),
+            sa.Column("host", sa.String, nullable=False),
+            sa.Column("port", sa.Integer, nullable=False),
+            sa.Column("sock_type", sa.Integer, nullable=False),
+            sa.Column("created", sa.TIMESTAMP,
+                      server_default=sa.func.current_timestamp()),
+            sa.Column("attempts", sa.Integer, nullable=False),
+            sa.Column("last_error", sa.String)
+            )
+
+
+def downgrade() -> None:
+    op.drop_table("adif_outbox")
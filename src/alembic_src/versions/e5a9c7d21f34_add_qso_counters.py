@@ -0,0 +1,74 @@
+"""add qso counter tables
+
+Revision ID: e5a9c7d21f34
+Revises: b3d81f6e0a27
+Create Date: 2026-10-18 13:02:17.481530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from sqlalchemy.engine.reflection import Inspector
+
+conn = op.get_bind()
+inspector = Inspector.from_engine(conn)
+tables = inspector.get_table_names()
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a9c7d21f34'
+down_revision: Union[str, None] = 'b3d81f6e0a27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # the model creates the tables on import. wrap in a check
+    if "call_counts" not in tables:
+        op.create_table("call_counts",
+            sa.Column("call", sa.String, primary_key=True),
+            sa.Column("qsos", sa.Integer, nullable=False)
+            )
+    if "ref_bands" not in tables:
+        op.create_table("ref_bands",
+            sa.Column("reference", sa.String, primary_key=True),
+            sa.Column("bands", sa.Integer, nullable=False)
+            )
+    if "activation_days" not in tables:
+        op.create_table("activation_days",
+            sa.Column("call", sa.String, primary_key=True),
+            sa.Column("reference", sa.String, primary_key=True),
+            sa.Column("day", sa.Date, primary_key=True),
+            sa.Column("bands", sa.Integer, nullable=False),
+            sa.Column("qsos", sa.Integer, nullable=False)
+            )
+
+    # fill the counters from the existing qsos. same as CounterQuery.rebuild
+    op.execute("DELETE FROM call_counts;")
+    op.execute("""INSERT INTO call_counts (call, qsos)
+        SELECT call, COUNT(*) FROM qsos
+        WHERE call IS NOT NULL
+        GROUP BY call;""")
+    op.execute("DELETE FROM ref_bands;")
+    op.execute("""INSERT INTO ref_bands (reference, bands)
+        SELECT sig_info,
+            SUM(DISTINCT CASE WHEN band > 0 THEN 1 << band ELSE 0 END)
+        FROM qsos
+        WHERE sig_info IS NOT NULL
+        GROUP BY sig_info;""")
+    op.execute("DELETE FROM activation_days;")
+    op.execute("""INSERT INTO activation_days (call, reference, day, bands, qsos)
+        SELECT call, sig_info, date(time_on),
+            SUM(DISTINCT CASE WHEN band > 0 THEN 1 << band ELSE 0 END),
+            COUNT(*)
+        FROM qsos
+        WHERE call IS NOT NULL AND sig_info IS NOT NULL
+            AND time_on IS NOT NULL
+        GROUP BY call, sig_info, date(time_on);""")
+
+
+def downgrade() -> None:
+    op.drop_table("call_counts")
+    op.drop_table("ref_bands")
+    op.drop_table("activation_days")
@@ -0,0 +1,28 @@
+"""add spot distance and bearing
+
+Revision ID: f2c4b8e61d09
+Revises: e5a9c7d21f34
+Create Date: 2026-10-18 13:48:05.217733
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2c4b8e61d09'
+down_revision: Union[str, None] = 'e5a9c7d21f34'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("spots", sa.Column("distance", sa.Integer, nullable=True))
+    op.add_column("spots", sa.Column("bearing", sa.Integer, nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("spots", "distance")
+    op.drop_column("spots", "bearing")
@@ -1,13 +1,15 @@
 import json
-import time
 import webview
 import logging as L
 import datetime
 import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import timedelta
 
-from bands import get_band, get_name_of_band
+from bands import Bands, get_band, get_name_of_band
 from db.db import DataBase
+from db.serializer import FastSchema
 from db.models.activators import Activator, ActivatorSchema
 from db.models.alerts import AlertsSchema
 from db.models.parks import ParkSchema
@@ -16,14 +18,33 @@ from db.models.spot_comments import SpotCommentSchema
 from db.models.spots import Spot, SpotSchema
 from db.models.user_config import UserConfigSchema
 from pota import PotaApi, PotaStats
+from pota.hydrate import ParkHydrator
+from pota.pota import SPOT_URL as POTA_SPOT_URL
 from sota import SotaApi
+from sota.sota import SPOT_URL as SOTA_SPOT_URL
 from utils.adif import AdifLog
+from utils.http_client import shared_client, NOT_MODIFIED
+from utils.spot_feed import SpotFeed
 from version import __version__
 
 from cat import CAT
+from cat.dispatcher import CatDispatcher
 from utils.distance import Distance
 
 logging = L.getLogger(__name__)
+SPOT_FETCH_TIMEOUT = 20.0  # seconds. per spot source
+CATALOG_MAX_AGE = timedelta(days=30)  # age before park lists are reloaded
+
+# the serializer used by each endpoint. a FastSchema gives the same json as
+# the marshmallow schema it wraps. put a schema instance here instead to use
+# marshmallow for that endpoint.
+SERIALIZERS = {
+    'get_spot': FastSchema(SpotSchema),
+    'get_spot_comments': FastSchema(SpotCommentSchema, many=True),
+    'get_qso_from_spot': FastSchema(QsoSchema),
+    'get_park': FastSchema(ParkSchema),
+    'get_summit': FastSchema(ParkSchema),
+}
 # IDTOKENPAT = r"^.*CognitoIdentityServiceProvider\..+\.idToken=([\w\.-]*\;)"
 
 
@@ -33,7 +54,24 @@ class JsApi:
         self.db = DataBase()
         self.pota = PotaApi()
         self.sota = SotaApi()
-        self.adif_log = AdifLog()
+        self.adif_log = AdifLog(outbox=self.db.outbox)
+        self._spot_sources = {
+            'POTA': self.pota.get_spots,
+            'SOTA': self.sota.get_spots,
+        }
+        self._spot_urls = {
+            'POTA': POTA_SPOT_URL,
+            'SOTA': SOTA_SPOT_URL,
+        }
+        self._fetch_pool = ThreadPoolExecutor(
+            max_workers=len(self._spot_sources),
+            thread_name_prefix='spot_fetch')
+        self.curr_pota_spots = None
+        self.curr_sota_spots = None
+        self.park_hydrator = ParkHydrator(self.pota.get_park)
+        self.park_progress = (0, 0)
+        self._park_update: threading.Thread = None
+        self.spot_feed = SpotFeed()
         logging.debug("init CAT...")
         cfg = self.db.get_user_config()
         try:
@@ -43,26 +81,41 @@ class JsApi:
         except Exception:
             logging.error("Error creating CAT object: ", exc_info=True)
             self.cat = None
+        self.cat_dispatch = None
+        if self.cat is not None:
+            self.cat_dispatch = CatDispatcher(
+                self.cat, poll_interval=JsApi._get_poll_interval(cfg))
+            self.cat_dispatch.add_listener(self._send_rig_online)
+            self.cat_dispatch.add_state_listener(self._send_rig_state)
         self.pw = None
 
     def get_spot(self, spot_id: int):
         logging.debug('py get_spot')
         spot = self.db.spots.get_spot(spot_id)
-        ss = SpotSchema()
-        return ss.dumps(spot)
+        return SERIALIZERS['get_spot'].dumps(spot)
 
     def get_spots(self):
         logging.debug('py get_spots')
-        spots = self.db.spots.get_spots()
-        ss = SpotSchema(many=True)
-        return ss.dumps(spots)
+        rows = self.db.spots.get_spot_rows()
+        return json.dumps(rows)
+
+    def get_spots_since(self, rev: int):
+        '''
+        Gets the filtered spots that were added, changed or removed since the
+        given spot feed revision. See `SpotFeed.get_since`.
+
+        :param int rev: the spot revision the frontend has. 0 for all spots
+        '''
+        logging.debug(f'py get_spots_since {rev}')
+        rows = self.db.spots.get_spot_rows()
+        delta = self.spot_feed.get_since(rev, rows)
+        return json.dumps(delta)
 
     def get_spot_comments(self, spot_id: int):
         spot = self.db.spots.get_spot(spot_id)
 
         x = self.db.get_spot_comments(spot.activator, spot.reference)
-        ss = SpotCommentSchema(many=True)
-        return ss.dumps(x)
+        return SERIALIZERS['get_spot_comments'].dumps(x)
 
     def insert_spot_comments(self, spot_id: int):
         '''
@@ -101,8 +154,7 @@ class JsApi:
             bearing = Distance.bearing(cfg.my_grid6, q.gridsquare)
             q.distance = dist
             q.bearing = bearing
-        qs = QsoSchema()
-        result = qs.dumps(q)
+        result = SERIALIZERS['get_qso_from_spot'].dumps(q)
 
         self.lock.release()
         return result
@@ -118,6 +170,19 @@ class JsApi:
         logging.debug("getting hunt count stats...")
         return self.db.qsos.get_activator_hunts(callsign)
 
+    def rebuild_counters(self) -> str:
+        '''
+        Rebuilds the QSO counters (QSOs per call, bands per reference and
+        hunted days) from the qsos table.
+        '''
+        logging.info("rebuilding qso counters")
+        self.lock.acquire()
+        try:
+            self.db.counters.rebuild()
+        finally:
+            self.lock.release()
+        return self._response(True, "QSO counters rebuilt")
+
     def get_park(self, ref: str, pull_from_pota: bool = True) -> str:
         '''
         Returns the JSON for the park if found in the db
@@ -142,15 +207,14 @@ class JsApi:
             logging.debug(f"get_park: park from api {api_res}")
             self.db.parks.update_park_data(api_res)
             park = self.db.parks.get_park(ref)
-        elif park.name is None:
-            logging.debug(f"get_park: park Name was None {ref}")
+        elif park is not None and self.db.parks.needs_park_data(park):
+            logging.debug(f"get_park: park data missing {ref}")
             api_res = self.pota.get_park(ref)
             logging.debug(f"get_park: park from api {api_res}")
             self.db.parks.update_park_data(api_res)
             park = self.db.parks.get_park(ref)
 
-        ps = ParkSchema()
-        return ps.dumps(park)
+        return SERIALIZERS['get_park'].dumps(park)
 
     def get_summit(self, ref: str, pull_from_sota: bool = True) -> str:
         '''
@@ -183,8 +247,7 @@ class JsApi:
         #     self.db.parks.update_park_data(api_res)
         #     summit = self.db.parks.get_park(ref)
 
-        ps = ParkSchema()
-        return ps.dumps(summit)
+        return SERIALIZERS['get_summit'].dumps(summit)
 
     def get_park_hunts(self, ref: str) -> str:
         '''
@@ -224,7 +287,7 @@ class JsApi:
 
         current_band = get_band(freq)
         new_band = True
-        if current_band is not None and current_band.value in hunted_bands:
+        if current_band != Bands.NOBAND and current_band.value in hunted_bands:
             new_band = False
 
         if hunted_bands is None:
@@ -309,9 +372,17 @@ class JsApi:
             return self._response(True, "")
 
         logging.info("starting import of ADIF file...")
-        AdifLog.import_from_log(filename[0], self.db)
 
-        return self._response(True, "Completed ADIF import")
+        def progress(read: int, inserted: int):
+            logging.info(f"ADIF import: read {read} inserted {inserted}")
+
+        try:
+            count = AdifLog.import_from_log(filename[0], self.db, progress)
+        except ValueError as ex:
+            logging.error("ADIF import failed", exc_info=ex)
+            return self._response(False, f"ADIF import failed: {ex}")
+
+        return self._response(True, f"Completed ADIF import of {count} QSOs")
 
     def log_qso(self, qso_data):
         '''
@@ -327,9 +398,16 @@ class JsApi:
 
         try:
             if qso_data['sig'] == 'POTA':
-                park_json = self.pota.get_park(qso_data['sig_info'])
-                logging.debug(f"updating park stat for: {park_json}")
-                self.db.parks.inc_park_hunt(park_json)
+                park_ref = qso_data['sig_info']
+                park = self.db.parks.get_park(park_ref)
+                if park is not None and \
+                        not self.db.parks.needs_park_data(park):
+                    # we have the park data already
+                    self.db.parks.inc_ref_hunt(park_ref)
+                else:
+                    park_json = self.pota.get_park(park_ref)
+                    logging.debug(f"updating park stat for: {park_json}")
+                    self.db.parks.inc_park_hunt(park_json)
             elif qso_data['sig'] == 'SOTA':
                 summit_code = qso_data['sig_info']
                 ok = self.db.parks.inc_summit_hunt(summit_code)
@@ -365,8 +443,23 @@ class JsApi:
 
         self.lock.release()
 
+        depth = self.adif_log.get_queue_depth()
+        if depth > 1:
+            return self._response(
+                True, f"QSO logged. {depth} QSOs waiting to send to logger")
         return self._response(True, "QSO logged successfully")
 
+    def get_adif_queue(self) -> str:
+        '''
+        Gets the number of QSOs waiting to be sent to the remote logger and
+        the last send error, if the last send failed.
+        '''
+        sender = self.adif_log.sender
+        return self._response(
+            True, '',
+            depth=self.adif_log.get_queue_depth(),
+            last_error=sender.last_error if sender is not None else None)
+
     def refresh_spot(self, spot_id: int, call: str, ref: str):
         '''
         Refreshes the data for a given spot. If the spot_id is out of date from
@@ -392,13 +485,12 @@ class JsApi:
         Exports the QSOs logged with this logger app into a file.
         '''
         try:
-            qs = self.db.qsos.get_qsos_from_app()
             cfg = self.db.get_user_config()
 
             dt = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
             log = AdifLog(filename=f"{dt}_export.adi")
-            for q in qs:
-                log.log_qso(q, cfg)
+            n = log.write_qsos(self.db.qsos.iter_qsos_from_app(), cfg)
+            logging.info(f"exported {n} qsos")
 
             return self._response(True, "QSOs exported successfully")
         except Exception as ex:
@@ -409,6 +501,9 @@ class JsApi:
     def set_user_config(self, config_json: any):
         logging.debug(f"setting config {config_json}")
         self.db.update_user_config(config_json)
+        if self.cat_dispatch is not None:
+            cfg = self.db.get_user_config()
+            self.cat_dispatch.set_poll_interval(JsApi._get_poll_interval(cfg))
 
     def set_band_filter(self, band: int):
         logging.debug(f"api setting band filter to: {band}")
@@ -486,17 +581,31 @@ class JsApi:
         elif mode.startswith("FT"):
             mode = cfg.ftx_mode
         logging.debug(f"adjusted mode {mode}")
-        self.cat.set_mode(mode)
-        self.cat.set_vfo(hrz)
+        # the rig is tuned on the dispatcher's thread
+        self.cat_dispatch.qsy(hrz, mode)
 
         return self._response(True, "")
 
+    def get_rig_status(self) -> str:
+        '''
+        Gets the CAT connection state and the last frequency and mode read
+        from the rig. The frontend is also told when they change, see
+        `_send_rig_online` and the rigstate event from `_send_rig_state`.
+        '''
+        if self.cat_dispatch is None:
+            return self._response(True, '', online=False, rig=None)
+
+        freq, mode = self.cat_dispatch.rig_state
+        return self._response(
+            True, '', online=self.cat_dispatch.online,
+            rig=JsApi._get_rig_state(freq, mode))
+
     def update_park_hunts_from_csv(self) -> str:
         '''
         Will use the current pota stats from hunter.csv to update the db with
-        new park hunt numbers. It will then update all the parks with data from
-        the POTA API. This method will run a while depending on how many parks
-        are in the csv file.
+        new park hunt numbers. The hunts are written in one transaction and
+        this returns right after. Updating the parks with data from the POTA
+        API is started in the background, see `get_park_update_progress`.
         '''
         ft = ('CSV files (*.csv;*.txt)', 'All files (*.*)')
         filename = webview.windows[0] \
@@ -507,17 +616,22 @@ class JsApi:
             return self._response(True, "user cancelled")
 
         logging.info(f"updating park hunts from {filename[0]}")
+        start = time.perf_counter()
         stats = PotaStats(filename[0])
-        hunts = stats.get_all_hunts()
 
-        for park in hunts:
-            count = stats.get_park_hunt_count(park)
-            j = {'reference': park, 'hunts': count}
-            self.db.parks.update_park_hunts(j, count)
+        with self.lock:
+            count = self.db.parks.upsert_park_hunts(stats.hunted_park_stats)
+            self.db.commit_session()
 
-        self.db.commit_session()
+        secs = time.perf_counter() - start
+        rate = count / secs if secs > 0 else count
+        logging.info(f"imported hunts for {count} parks in {secs:.2f}s "
+                     f"({rate:.0f} rows/s)")
+
+        self._start_park_update(stats.get_hunted_locations())
 
-        return self._update_all_parks()
+        return self._response(
+            True, f"Updated hunts for {count} parks", persist=True)
 
     def export_park_data(self) -> str:
         '''
@@ -565,6 +679,26 @@ class JsApi:
         return self._response(
             True, "Park data imported successfully", persist=True)
 
+    def load_park_catalog(self, location: str) -> str:
+        '''
+        Loads the park data for all the parks in a location into the db so
+        they can be looked up without calling the POTA api. If given an
+        entity prefix (ex "US") all the locations of the entity are loaded.
+
+        :param str location: POTA location ("US-CA") or entity prefix ("US")
+        '''
+        locations = [
+            x for x in self.db.locations.get_all_locations()
+            if x == location or x.startswith(f"{location}-")]
+
+        if len(locations) == 0:
+            locations = [location]
+
+        count = self._load_park_catalog(locations)
+
+        return self._response(
+            True, f"Loaded {count} parks for {location}", persist=True)
+
     def get_seen_regions(self) -> str:
         '''
         Gets a sorted list of distinct regions (POTA) and associations (SOTA)
@@ -595,6 +729,7 @@ class JsApi:
                               many=True, partial=True)
         self.db.session.add_all(to_load)
         self.db.commit_session()
+        self.db.alerts.invalidate()
 
     def delete_alert(self, alert_id: int):
         '''
@@ -603,6 +738,7 @@ class JsApi:
         logging.debug(f'py delete_alerts {alert_id}')
         self.db.alerts.delete_alert(alert_id)
         self.db.commit_session()
+        self.db.alerts.invalidate()
 
     def snooze_alert(self, alert_id: int) -> str:
         '''
@@ -611,6 +747,7 @@ class JsApi:
         logging.debug(f'py snooze_alert {alert_id}')
         self.db.alerts.snooze_alert(alert_id)
         self.db.commit_session()
+        self.db.alerts.invalidate()
 
         return self._response(True, "Alert snoozed!")
 
@@ -639,43 +776,168 @@ class JsApi:
     def _do_update(self):
         '''
         The main update method. Called on a timer
+
+        The spot sources are fetched at the same time without holding the
+        lock. The lock is only held while the db is updated. If none of the
+        sources have changed since the last update, the db is left alone.
         '''
         logging.debug('updating db')
+        spots = self._fetch_spots()
+        for name, result in spots.items():
+            if result is None:
+                # a 304 next time would leave us with no spots for this
+                # source. make sure the next fetch gets the whole list
+                shared_client.clear_validators(self._spot_urls[name])
+
+        json = spots['POTA']
+        sota = spots['SOTA']
+
+        if json is NOT_MODIFIED and sota is NOT_MODIFIED:
+            logging.debug("spots not modified. skipping update")
+            return
+
+        if json is NOT_MODIFIED:
+            json = self.curr_pota_spots
+        if sota is NOT_MODIFIED:
+            sota = self.curr_sota_spots
+
+        if json is None:
+            logging.warning("no POTA spots fetched. skipping update")
+            # the SOTA list may not be saved, so it has to be fetched again
+            shared_client.clear_validators(self._spot_urls['SOTA'])
+            return
+
         self.lock.acquire()
 
         try:
-            json = self.pota.get_spots()
-            sota = self.sota.get_spots()
             self.db.update_all_spots(json, sota)
             self._handle_alerts()
             self.curr_pota_spots = json
             self.curr_sota_spots = sota
-        except ConnectionError as con_ex:
-            logging.warning("Connection error in do_update: ")
-            logging.exception(con_ex)
         except Exception as ex:
             logging.error("Unhandled error caught in do_update: ")
             logging.error(type(ex).__name__)
             logging.exception(ex)
+            self.db.reset_spot_cache()
+            shared_client.clear_validators()
         finally:
             self.lock.release()
 
+    def _fetch_spots(self) -> dict[str, any]:
+        '''
+        Fetches the spots from all of the spot sources concurrently. The time
+        taken is that of the slowest source, not the sum of all of them.
+
+        :returns dict of source name to the json from its api. a source that
+            failed or timed out will have a value of None.
+        '''
+        futures = {
+            name: self._fetch_pool.submit(get, timeout=SPOT_FETCH_TIMEOUT)
+            for name, get in self._spot_sources.items()
+        }
+        wait(futures.values(), timeout=SPOT_FETCH_TIMEOUT)
+
+        result = {}
+        for name, future in futures.items():
+            if not future.done():
+                logging.warning(f"timed out fetching {name} spots")
+                future.cancel()
+                result[name] = None
+                continue
+
+            try:
+                result[name] = future.result()
+            except Exception as ex:
+                logging.warning(f"error fetching {name} spots: ")
+                logging.exception(ex)
+                result[name] = None
+
+        return result
+
+    def get_park_update_progress(self) -> str:
+        '''
+        Returns the progress of the current (or last) park data update.
+        '''
+        done, total = self.park_progress
+        return self._response(True, '', done=done, total=total)
+
+    def stop_park_update(self) -> str:
+        '''
+        Stops a running park data update. Parks that were already updated are
+        kept and the update will continue from there the next time it runs.
+        '''
+        self.park_hydrator.stop()
+        return self._response(True, "Park data update stopped")
+
+    def _start_park_update(self, locations: list[str]):
+        '''
+        Loads the park catalogs for the locations then fills in the rest of
+        the parks from the POTA api, on a background thread. Does nothing if
+        an update is already running.
+        '''
+        if self._park_update is not None and self._park_update.is_alive():
+            logging.info("park data update already running")
+            return
+
+        def update():
+            # fill in as many parks as we can with one download per location
+            self._load_park_catalog(locations)
+            self._update_all_parks()
+
+        self._park_update = threading.Thread(
+            target=update, name='park_update', daemon=True)
+        self._park_update.start()
+
     def _update_all_parks(self) -> str:
         logging.info("updating all parks in db")
 
-        parks = self.db.parks.get_parks()
-        for park in parks:
-            if park.name is not None:
-                continue
+        refs = self.db.parks.get_unnamed_park_refs()
+        logging.info(f"{len(refs)} parks need data from POTA")
 
-            api_res = self.pota.get_park(park.reference)
-            self.db.parks.update_park_data(api_res)  # delay_commit=True
+        def save(parks: list[any]):
+            with self.lock:
+                self.db.parks.update_parks_data(parks)
 
-            time.sleep(0.001)  # dont want to hurt POTA
+        def progress(done: int, total: int):
+            self.park_progress = (done, total)
+            if done % 100 == 0 or done == total:
+                logging.info(f"updated park data {done}/{total}")
+
+        self.park_progress = (0, len(refs))
+        self.park_hydrator.run(refs, save, progress)
 
         return self._response(
             True, "Park Data updated successfully", persist=True)
 
+    def _load_park_catalog(self, locations: list[str]) -> int:
+        '''
+        Loads the park lists for the given locations into the db. Locations
+        loaded within CATALOG_MAX_AGE are skipped.
+
+        :returns number of parks inserted or updated
+        '''
+        count = 0
+        max_age = CATALOG_MAX_AGE.total_seconds()
+
+        for loc in locations:
+            if self.db.parks.is_catalog_fresh(loc, CATALOG_MAX_AGE):
+                continue
+
+            try:
+                parks = self.pota.get_location_parks(loc, max_age)
+            except Exception as ex:
+                logging.warning(f"error getting parks for {loc}", exc_info=ex)
+                continue
+
+            if parks is None:
+                continue
+
+            with self.lock:
+                count += self.db.parks.load_location_parks(loc, parks)
+
+        logging.info(f"loaded {count} parks from {len(locations)} locations")
+        return count
+
     def _get_activator(self, callsign: str) -> Activator:
         ''''
         Gets the activator model from the db or pulls the data to create a
@@ -758,6 +1020,47 @@ class JsApi:
         cfg.is_max = 1 if is_max else 0
         self.db.commit_session()
 
+    def _send_rig_online(self, online: bool):
+        if len(webview.windows) > 0:
+            js = """if (window.pywebview.state !== undefined &&
+                        window.pywebview.state.setRigOnline !== undefined) {{
+                            window.pywebview.state.setRigOnline({online});
+                    }}
+                """.format(online=json.dumps(online))
+            webview.windows[0].evaluate_js(js)
+
+    def _send_rig_state(self, freq: str, mode: str):
+        # an event, so more than one component can follow the rig
+        if len(webview.windows) > 0:
+            js = """window.dispatchEvent(
+                        new CustomEvent('rigstate', {{ detail: {obj} }}));
+                """.format(obj=json.dumps(JsApi._get_rig_state(freq, mode)))
+            webview.windows[0].evaluate_js(js)
+
+    @staticmethod
+    def _get_rig_state(freq: str, mode: str) -> dict:
+        '''
+        The rig reading as the frontend uses it: frequency in kHz like the
+        spots, the rig mode and the band value.
+        '''
+        if freq is None:
+            return None
+        try:
+            khz = float(freq) / 1000.0
+        except ValueError:
+            return None
+        return {
+            # up to Hz resolution, no trailing zeros or exponent
+            'freq': f"{khz:.3f}".rstrip('0').rstrip('.'),
+            'mode': mode,
+            'band': get_band(khz).value
+        }
+
+    @staticmethod
+    def _get_poll_interval(cfg) -> float:
+        ms = cfg.rig_poll_ms if cfg.rig_poll_ms is not None else 1000
+        return max(ms, 0) / 1000.0
+
     def _handle_alerts(self):
         def get_str(spot: Spot) -> str:
             return f"📢 New one in {spot.locationDesc}: {spot.activator} at  {spot.reference} 🔸 {spot.mode} on {spot.frequency}"  # noqa
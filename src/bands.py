@@ -3,11 +3,14 @@ This file contains data about the Ham radio bands.
 
 Import Bands for the main enum values, import bandNames for a string of names
 import bandLimits for the band edges (not currently configurable). Import
-get_band(freq) for a method to take a freq and return a BAND enum.
+get_band(freq) for a method to take a freq and return a BAND enum, or
+get_bands(freqs) to do a whole list of them at once.
 
 '''
 
+from bisect import bisect_left
 from enum import Enum
+from typing import Iterable
 import logging as L
 logging = L.getLogger(__name__)
 
@@ -57,36 +60,80 @@ bandLimits = {
 }
 
 
+# the band edges sorted by lower edge, for bisecting
+_edges = sorted((lmt[0], lmt[1], band) for band, lmt in bandLimits.items())
+_lower_edges = [e[0] for e in _edges]
+
+
+def _to_float(freq) -> float:
+    try:
+        return float(freq)
+    except (TypeError, ValueError):
+        return None
+
+
+def _classify(f: float) -> Bands:
+    '''
+    Bisect for the band with the highest lower edge below the frequency, then
+    check the upper edge. Band edges are not in the band.
+    '''
+    if f is None:
+        return Bands.NOBAND
+    i = bisect_left(_lower_edges, f) - 1
+    if i >= 0 and f < _edges[i][1]:
+        return _edges[i][2]
+    return Bands.NOBAND
+
+
 def get_band(freq: str) -> Bands:
     '''
     Get the enumerated Bands value for the given frequency
 
-    :param str freq: string of the frequency in MHz
+    :param str freq: string of the frequency in kHz
+    :returns the band. NOBAND if the freq is missing, invalid or not in a band
     '''
-    try:
-        f = float(freq)
-        for band, lmt in bandLimits.items():
-            if (f > lmt[0] and f < lmt[1]):
-                return band
-    except ValueError:
-        logging.error("invalid str to float conv in get_band(freq)")
-        return Bands.NOBAND
+    return _classify(_to_float(freq))
+
+
+def get_bands(freqs: Iterable[str]) -> list[Bands]:
+    '''
+    Batch version of `get_band`. Classifies a whole column of frequencies in
+    one call, converting each distinct value only once.
+
+    :param Iterable[str] freqs: strings (or numbers) of frequencies in kHz
+    :returns list of bands in the same order as freqs
+    '''
+    seen = dict[str, Bands]()
+    result = []
+    for freq in freqs:
+        b = seen.get(freq)
+        if b is None:
+            b = seen[freq] = _classify(_to_float(freq))
+        result.append(b)
+    return result
 
 
 def get_band_name(freq: str) -> str:
     '''
     Get band name for the given frequency.
 
-    :param str freq: string of the frequency in MHz
+    :param str freq: string of the frequency in kHz
+    :returns the band name. 'NA' when `get_band` returns NOBAND
     '''
-    try:
-        f = float(freq)
-        for band, lmt in bandLimits.items():
-            if (f >= lmt[0] and f <= lmt[1]):
-                return bandNames[band.value]
-    except ValueError:
-        logging.error("invalid str to float conv in get_band_name(freq)")
-        return bandNames[Bands.NOBAND]
+    return bandNames[get_band(freq).value]
+
+
+def get_freq_band(freq: str) -> tuple[float, int]:
+    '''
+    Get the numeric frequency and the band value for the given frequency. Used
+    to fill the numeric freq and band columns in the db.
+
+    :param str freq: string of the frequency in kHz
+    :returns tuple of the freq as a float (None if invalid) and the Bands
+        value (NOBAND if not in a band)
+    '''
+    f = _to_float(freq)
+    return (f, _classify(f).value)
 
 
 def get_name_of_band(band: Bands) -> str:
@@ -0,0 +1,263 @@
+import threading
+import time
+from typing import Callable
+from cat.icat import ICat
+import logging as L
+
+
+logger = L.getLogger(__name__)
+
+HEARTBEAT_INTERVAL = 5.0
+'''Seconds between connection checks while the rig is online'''
+
+RECONNECT_MIN = 0.5
+'''Seconds before the first reconnect after the rig goes offline'''
+
+RECONNECT_MAX = 30.0
+'''Longest wait between reconnects. The wait doubles after each failure'''
+
+
+class CatDispatcher:
+    '''
+    Runs the commands for one rig on a worker thread so callers never wait on
+    the rig's socket.
+
+    Only the latest tune request is kept. If the user clicks through spots
+    faster than the rig can follow, the pending mode and frequency are
+    replaced and the rig goes straight to the last one clicked.
+
+    Between commands the worker pings the rig to keep the connection warm
+    and reconnects with an exponential backoff when it's down, so a tune
+    doesn't have to wait for a connect.
+
+    When a poll interval is set the worker also reads the rig's frequency
+    and mode. State listeners are only called when the reading changes.
+    '''
+
+    def __init__(self, cat: ICat,
+                 heartbeat: float = HEARTBEAT_INTERVAL,
+                 reconnect_min: float = RECONNECT_MIN,
+                 reconnect_max: float = RECONNECT_MAX,
+                 poll_interval: float = 0):
+        '''
+        :param ICat cat: an initialized CAT interface
+        :param float heartbeat: seconds between pings while online
+        :param float reconnect_min: first reconnect wait in seconds
+        :param float reconnect_max: longest reconnect wait in seconds
+        :param float poll_interval: seconds between rig reads. 0 to not read
+        '''
+        self.cat = cat
+        self.heartbeat = heartbeat
+        self.reconnect_min = reconnect_min
+        self.reconnect_max = reconnect_max
+        self.poll_interval = poll_interval
+        self.online = bool(getattr(cat, 'online', False))
+        self.rig_state: tuple[str, str] = (None, None)
+        self._listeners: list[Callable[[bool], None]] = []
+        self._state_listeners: list[Callable[[str, str], None]] = []
+        self._can_poll = True
+        self._pending: dict[str, str] = {}
+        self._cond = threading.Condition()
+        self._stop = False
+        self._busy = False
+        self._backoff = reconnect_min
+        self._next_check = time.monotonic() + \
+            (heartbeat if self.online else reconnect_min)
+        self._next_poll = time.monotonic()
+        self._worker = threading.Thread(
+            target=self._run, name='cat_dispatch', daemon=True)
+        self._worker.start()
+
+    def qsy(self, freq: str, mode: str):
+        '''
+        Queues a mode and frequency change and returns right away. Replaces
+        any change that hasn't been sent yet.
+
+        :param str freq: frequency in Hz
+        :param str mode: rig mode (CW, USB, ...). None to leave it as is
+        '''
+        with self._cond:
+            self._pending = {'mode': mode, 'freq': freq}
+            self._cond.notify_all()
+
+    def set_mode(self, mode: str):
+        '''Queues a mode change. The pending frequency is kept.'''
+        with self._cond:
+            self._pending['mode'] = mode
+            self._cond.notify_all()
+
+    def set_vfo(self, freq: str):
+        '''Queues a frequency change. The pending mode is kept.'''
+        with self._cond:
+            self._pending['freq'] = freq
+            self._cond.notify_all()
+
+    def add_listener(self, listener: Callable[[bool], None]):
+        '''
+        Adds a function that is called with the new online state whenever
+        the rig goes on or offline. It's called on the worker thread.
+        '''
+        self._listeners.append(listener)
+
+    def add_state_listener(self, listener: Callable[[str, str], None]):
+        '''
+        Adds a function that is called with the frequency (Hz) and mode
+        whenever a poll reads something different from the last poll. It's
+        called on the worker thread.
+        '''
+        self._state_listeners.append(listener)
+
+    def set_poll_interval(self, poll_interval: float):
+        '''
+        Changes how often the rig is read.
+
+        :param float poll_interval: seconds between reads. 0 to stop reading
+        '''
+        with self._cond:
+            self.poll_interval = poll_interval
+            self._next_poll = time.monotonic()
+            self._cond.notify_all()
+
+    def stop(self, timeout: float = None):
+        '''Stops the worker. Pending commands are dropped.'''
+        with self._cond:
+            self._stop = True
+            self._pending = {}
+            self._cond.notify_all()
+        self._worker.join(timeout)
+
+    def wait_idle(self, timeout: float = None) -> bool:
+        '''
+        Waits for the pending commands to be sent.
+
+        :returns False if it timed out
+        '''
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not self._pending and not self._busy, timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._pending or self._stop,
+                    max(0, self._next_due() - time.monotonic()))
+                if self._stop:
+                    return
+                cmd = self._pending
+                self._pending = {}
+                self._busy = True
+
+            now = time.monotonic()
+            if cmd:
+                ok = self._send(cmd.get('mode'), cmd.get('freq'))
+                # read the rig back soon so listeners see the change
+                self._next_poll = now
+            elif self._polling() and now >= self._next_poll:
+                ok = self._poll()
+            elif now >= self._next_check:
+                ok = self._check()
+            else:
+                ok = self.online
+
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+
+            self._set_online(ok)
+
+    def _polling(self) -> bool:
+        return self.poll_interval > 0 and self._can_poll and self.online
+
+    def _next_due(self) -> float:
+        if self._polling():
+            return min(self._next_check, self._next_poll)
+        return self._next_check
+
+    def _poll(self) -> bool:
+        '''
+        Reads the rig's frequency and mode. A good read counts as a
+        heartbeat.
+        '''
+        now = time.monotonic()
+        self._next_poll = now + self.poll_interval
+        try:
+            freq = self.cat.get_vfo()
+            mode = self.cat.get_mode()
+        except NotImplementedError:
+            logger.info("CAT interface can't read the rig. not polling")
+            self._can_poll = False
+            return self.online
+        except Exception as e:
+            logger.warning("error polling rig", exc_info=e)
+            return False
+
+        if freq is not None:
+            self._next_check = now + self.heartbeat
+            self._set_state(freq, mode)
+        return bool(getattr(self.cat, 'online', freq is not None))
+
+    def _set_state(self, freq: str, mode: str):
+        if (freq, mode) == self.rig_state:
+            return
+        self.rig_state = (freq, mode)
+        logger.debug(f"rig state {freq} {mode}")
+        for listener in self._state_listeners:
+            try:
+                listener(freq, mode)
+            except Exception as e:
+                logger.warning("error in rig state listener", exc_info=e)
+
+    def _check(self) -> bool:
+        '''
+        Pings the rig if it's online or tries to reconnect if it isn't, then
+        schedules the next check.
+        '''
+        try:
+            if self.online:
+                ok = self.cat.ping() or self.cat.connect()
+            else:
+                ok = self.cat.connect()
+        except Exception as e:
+            logger.warning("error checking CAT connection", exc_info=e)
+            ok = False
+
+        if ok:
+            self._backoff = self.reconnect_min
+            wait = self.heartbeat
+        else:
+            wait = self._backoff
+            self._backoff = min(self._backoff * 2, self.reconnect_max)
+            logger.debug(f"rig offline, reconnecting in {wait}s")
+
+        self._next_check = time.monotonic() + wait
+        return ok
+
+    def _send(self, mode: str, freq: str) -> bool:
+        ok = True
+        try:
+            if mode:
+                ok = self.cat.set_mode(mode) and ok
+            if freq is not None:
+                ok = self.cat.set_vfo(freq) and ok
+        except Exception as e:
+            logger.warning("error sending CAT command", exc_info=e)
+            return False
+
+        logger.debug(f"sent mode {mode} freq {freq} ok={ok}")
+        return bool(getattr(self.cat, 'online', ok))
+
+    def _set_online(self, online: bool):
+        if online == self.online:
+            return
+        if not online:
+            # start reconnecting soon instead of at the next heartbeat
+            self._backoff = self.reconnect_min
+            self._next_check = time.monotonic() + self._backoff
+        self.online = online
+        logger.info(f"rig is {'online' if online else 'offline'}")
+        for listener in self._listeners:
+            try:
+                listener(online)
+            except Exception as e:
+                logger.warning("error in rig online listener", exc_info=e)
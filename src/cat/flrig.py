@@ -1,11 +1,30 @@
-import socket
-import xmlrpc
+import http.client
+import xmlrpc.client
 from cat.icat import ICat
 import logging as L
 
 
 logger = L.getLogger(__name__)
 
+# errors that mean flrig can't be reached
+RPC_ERRORS = (OSError, http.client.HTTPException, xmlrpc.client.Error)
+
+
+class _Transport(xmlrpc.client.Transport):
+    '''
+    The xmlrpc transport with a socket timeout. The transport keeps its http
+    connection open between calls and reopens it if flrig closed it.
+    '''
+
+    def __init__(self, timeout: float):
+        super().__init__()
+        self.timeout = timeout
+
+    def make_connection(self, host):
+        conn = super().make_connection(host)
+        conn.timeout = self.timeout
+        return conn
+
 
 class flrig(ICat):
 
@@ -20,36 +39,55 @@ class flrig(ICat):
         '''
         self.host = kwargs['host']
         self.port = kwargs['port']
+        self.server = None
+        self.connect()
 
+    def connect(self) -> bool:
         target = f"http://{self.host}:{self.port}"
         logger.debug("%s", target)
 
-        self.server = xmlrpc.client.ServerProxy(target)
-        self.online = True
+        if self.server is not None:
+            self.server('close')()
+        self.server = xmlrpc.client.ServerProxy(
+            target, transport=_Transport(timeout=0.5))
+        self.online = self.ping()
+        if not self.online:
+            logger.warning("no flrig connection")
+        return self.online
+
+    def ping(self) -> bool:
+        '''Gets the flrig version to check the connection'''
         try:
             ver = self.server.main.get_version()
             logger.debug(ver)
-        except (ConnectionRefusedError, TimeoutError) as e:
-            self.online = False
-            self.server = None
-            logger.warning("no flrig connection", exc_info=e)
+            return True
+        except RPC_ERRORS as e:
+            logger.debug("ping", exc_info=e)
+            return False
 
     def set_mode(self, mode: str) -> bool:
         """Sets the radios mode"""
-        try:
-            self.online = True
-            return self.server.rig.set_mode(mode)
-        except ConnectionRefusedError as e:
-            self.online = False
-            logger.warning("set_mode", exc_info=e)
-        return False
+        return self._call("rig.set_mode", mode)
 
     def set_vfo(self, freq: str) -> bool:
         """Sets the radios vfo"""
+        return self._call("rig.set_frequency", float(freq))
+
+    def get_vfo(self) -> str:
+        """Gets the radios vfo"""
+        return self._call("rig.get_vfo") or None
+
+    def get_mode(self) -> str:
+        """Gets the radios mode"""
+        return self._call("rig.get_mode") or None
+
+    def _call(self, method: str, *args) -> bool:
         try:
+            # the proxy takes dotted method names as attributes
+            result = getattr(self.server, method)(*args)
             self.online = True
-            return self.server.rig.set_frequency(float(freq))
-        except ConnectionRefusedError as e:
+            return result
+        except RPC_ERRORS as e:
             self.online = False
-            logger.warning("set_vfo", exc_info=e)
+            logger.warning(method, exc_info=e)
         return False
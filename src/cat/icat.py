@@ -37,3 +37,40 @@ class ICat(ABC):
         returns True on success
         '''
         raise NotImplementedError
+
+    def connect(self) -> bool:
+        '''
+        Opens the connection to the CAT program again, closing the old one.
+        Called in the background when the rig is offline.
+
+        returns True if connected
+        '''
+        self.init_cat(host=self.host, port=self.port)
+        return self.online
+
+    def ping(self) -> bool:
+        '''
+        Checks that the connection is still working. Interfaces that can
+        read something from the rig should override this.
+
+        returns True if the connection is up
+        '''
+        return getattr(self, 'online', False)
+
+    def get_vfo(self) -> str:
+        '''
+        Reads the radios VFO frequency.
+
+        returns the frequency in Hz as a string or None if it couldn't be read.
+        Raises NotImplementedError if the interface can't read the rig.
+        '''
+        raise NotImplementedError
+
+    def get_mode(self) -> str:
+        '''
+        Reads the radios mode.
+
+        returns the mode string or None if it couldn't be read. Raises
+        NotImplementedError if the interface can't read the rig.
+        '''
+        raise NotImplementedError
@@ -7,6 +7,13 @@ logger = L.getLogger(__name__)
 
 
 class rigctld(ICat):
+    '''
+    Keeps one socket open to rigctld. If a command finds the socket closed,
+    ex: rigctld was restarted, it reconnects once and sends it again.
+
+    Replies are read up to the number of lines the command returns, so a
+    reply split over TCP segments can't be read as the next one's.
+    '''
 
     def init_cat(self, **kwargs):
         '''
@@ -19,48 +26,106 @@ class rigctld(ICat):
         '''
         self.host = kwargs['host']
         self.port = kwargs['port']
+        self.socket = None
+        self.connect()
 
+    def connect(self) -> bool:
+        self._close()
         try:
-            self.socket = socket.socket()
-            self.socket.settimeout(0.5)
-            self.socket.connect((self.host, self.port))
+            self.socket = socket.create_connection(
+                (self.host, self.port), timeout=0.5)
+            self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
             logger.info(f"Connected to rigctrld - {self.host}:{self.port}")
             self.online = True
         except (socket.timeout, socket.error) as e:
             self.socket = None
             self.online = False
             logger.warning("init_cat", exc_info=e)
+        return self.online
+
+    def ping(self) -> bool:
+        '''Reads the frequency to check the connection'''
+        return self._send_cmd("f", retry=False) is not None
 
     def set_mode(self, mode: str) -> bool:
         """sets the radios mode"""
-        if self.socket:
-            try:
-                self.online = True
-                self.socket.send(bytes(f"M {mode} 0\n", "utf-8"))
-                _ = self.socket.recv(1024).decode().strip()
-                return True
-            except socket.error as e:
-                self.online = False
-                logger.debug("set_mode", exc_info=e)
-                self.socket = None
-                return False
-
-        self.init_cat(host=self.host, port=self.port)
-        return False
+        return self._send_cmd(f"M {mode} 0") is not None
 
     def set_vfo(self, freq: str) -> bool:
         """sets the radios vfo"""
-        if self.socket:
+        return self._send_cmd(f"F {freq}") is not None
+
+    def get_vfo(self) -> str:
+        """gets the radios vfo"""
+        reply = self._send_cmd("f")
+        # errors come back as RPRT -n
+        if not reply or reply.startswith("RPRT"):
+            return None
+        return reply.split()[0]
+
+    def get_mode(self) -> str:
+        """gets the radios mode"""
+        reply = self._send_cmd("m", lines=2)
+        if not reply or reply.startswith("RPRT"):
+            return None
+        # the mode is followed by the passband on the next line
+        return reply.split()[0]
+
+    def _send_cmd(self, cmd: str, lines: int = 1,
+                  retry: bool = True) -> str:
+        '''
+        Sends a command and returns the reply, or None if it failed.
+
+        :param int lines: number of lines in the reply
+        :param bool retry: reconnect and send again if the socket was dropped
+        '''
+        if self.socket is None and not (retry and self.connect()):
+            return None
+
+        try:
+            self.socket.sendall(bytes(f"{cmd}\n", "utf-8"))
+            reply = self._read_reply(lines)
+            self.online = True
+            return reply
+        except socket.error as e:
+            logger.debug(f"rigctld cmd {cmd}", exc_info=e)
+            self._close()
+            self.online = False
+
+        if retry and self.connect():
+            return self._send_cmd(cmd, lines, retry=False)
+        return None
+
+    def _read_reply(self, lines: int) -> str:
+        '''
+        Reads from the socket until the reply has the given number of lines.
+        An error is a single RPRT line whatever the command.
+        '''
+        while True:
+            end = 0
+            count = 0
+            while count < lines:
+                nl = self._buf.find(b"\n", end)
+                if nl < 0:
+                    break
+                is_rprt = self._buf.startswith(b"RPRT", end)
+                end = nl + 1
+                count = lines if is_rprt else count + 1
+
+            if count == lines:
+                reply, self._buf = self._buf[:end], self._buf[end:]
+                return reply.decode().strip()
+
+            data = self.socket.recv(1024)
+            if len(data) == 0:
+                raise ConnectionResetError("rigctld closed the connection")
+            self._buf += data
+
+    def _close(self):
+        if getattr(self, 'socket', None) is not None:
             try:
-                self.online = True
-                self.socket.send(bytes(f"F {freq}\n", "utf-8"))
-                _ = self.socket.recv(1024).decode().strip()
-                return True
-            except socket.error as e:
-                self.online = False
-                logger.debug("set_vfo", exc_info=e)
-                self.socket = None
-                return False
-
-        self.init_cat(host=self.host, port=self.port)
-        return False
+                self.socket.close()
+            except socket.error:
+                pass
+        self.socket = None
+        self._buf = b""
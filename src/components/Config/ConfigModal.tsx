@@ -28,7 +28,8 @@ const def: UserConfig = {
     cw_mode: 'CW',
     ftx_mode: 'USB',
     qth_string: '',
-    rig_if_type: ''
+    rig_if_type: '',
+    rig_poll_ms: 1000
 };
 
 export default function ConfigModal() {
@@ -219,6 +220,14 @@ export default function ConfigModal() {
                                 onChange={(e) => {
                                     setConfig({ ...config, flr_port: Number.parseInt(e.target.value) });
                                 }} />
+                            <Tooltip title="How often the frequency and mode are read from the rig. 0 to turn off">
+                                <TextField id="rig_poll_ms" label="Rig poll (ms)"
+                                    fullWidth
+                                    value={config?.rig_poll_ms}
+                                    onChange={(e) => {
+                                        setConfig({ ...config, rig_poll_ms: Number.parseInt(e.target.value) || 0 });
+                                    }} />
+                            </Tooltip>
                         </Stack>
                         <p className="modal-config-text">
                             Mode strings used to specify a custom mode for RIG control
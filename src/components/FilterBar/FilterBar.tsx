@@ -9,6 +9,7 @@ import Switch from '@mui/material/Switch';
 import { Stack, Typography, createStyles, useTheme } from '@mui/material';
 import { styled } from '@mui/material/styles';
 import { createEqualityFilter, useAppContext } from '../AppContext';
+import { RigState } from '../../@types/Rig';
 
 import './FilterBar.scss'
 
@@ -60,6 +61,24 @@ export const FilterBar = (props: IFilterBarPros) => {
         };
     }, []);
 
+    // a band filter that is on follows the rig to its band
+    React.useEffect(() => {
+        function onRigState(e: Event) {
+            const rig = (e as CustomEvent<RigState>).detail;
+            if (rig === null || rig.band === 0)
+                return;
+            if (band === '' || band === '0' || parseInt(band) === rig.band)
+                return;
+
+            const m = rig.band.toString();
+            setBandFilter(m);
+            window.localStorage.setItem("BAND_FILTER", m);
+        }
+
+        window.addEventListener('rigstate', onRigState);
+        return () => window.removeEventListener('rigstate', onRigState);
+    }, [band, contextData]);
+
     const handleChange = (event: SelectChangeEvent) => {
         let m = event.target.value as string
         setModeFilter(m);
@@ -10,6 +10,7 @@ export default function Footer() {
     const [version, setVersion] = React.useState('');
     const [dbVersion, setDbVersion] = React.useState('');
     const [isWorking, setIsWorking] = React.useState(false);
+    const [rigOnline, setRigOnline] = React.useState(false);
     const { contextData, setData } = useAppContext();
 
     React.useEffect(() => {
@@ -27,6 +28,16 @@ export default function Footer() {
                         setVersion(verInfo.app_ver);
                         setDbVersion(verInfo.db_ver);
                     });
+
+                if (!window.pywebview.state) {
+                    window.pywebview.state = {}
+                }
+                window.pywebview.state.setRigOnline = setRigOnline;
+
+                window.pywebview.api.get_rig_status()
+                    .then((x: string) => {
+                        setRigOnline(JSON.parse(x).online);
+                    });
             }
         }
     }, []);
@@ -81,6 +92,7 @@ export default function Footer() {
         <div className="footer">
             <div className='left'>
                 <span id="versionNum">{version} - db: {dbVersion}</span>
+                <span id="rigStatus">CAT: {rigOnline ? 'online' : 'offline'}</span>
                 <Link href="#" onClick={() => { handleOnClick() }} ml={1} mr={1}>
                     Export Logged QSOs
                 </Link>
@@ -15,6 +15,7 @@ import { getParkInfo, getStateFromLocDesc, getSummitInfo } from '../../pota';
 import { Park } from '../../@types/Parks';
 import { ParkInfo } from '../../@types/PotaTypes';
 import { Summit } from '../../@types/Summit';
+import { RigState } from '../../@types/Rig';
 
 dayjs.extend(utc);
 
@@ -41,6 +42,17 @@ let defaultQso: Qso = {
 }
 
 
+// the rig can't tell FT8 from SSB, so only voice and CW modes are followed
+function getQsoMode(rigMode: string | null, mode: string): string {
+    const m = rigMode?.toUpperCase() ?? '';
+    if (m.startsWith('CW'))
+        return 'CW';
+    if ((m === 'USB' || m === 'LSB') && ['', 'CW', 'SSB'].includes(mode))
+        return 'SSB';
+    return mode;
+}
+
+
 export default function QsoEntry() {
     const [qso, setQso] = React.useState(defaultQso);
     const [otherOps, setOtherOps] = React.useState('');
@@ -342,6 +354,19 @@ export default function QsoEntry() {
         updateOtherOperators(contextData.otherOperators);
     }, [contextData.otherOperators]);
 
+    // follow the rig's frequency and mode when CAT polling is on
+    React.useEffect(() => {
+        function onRigState(e: Event) {
+            const rig = (e as CustomEvent<RigState>).detail;
+            if (rig === null)
+                return;
+            setQso((q) => ({ ...q, freq: rig.freq, mode: getQsoMode(rig.mode, q.mode) }));
+        }
+
+        window.addEventListener('rigstate', onRigState);
+        return () => window.removeEventListener('rigstate', onRigState);
+    }, []);
+
 
     const textFieldStyle: React.CSSProperties = { fontSize: 14, textTransform: "uppercase" };
     const otherOpsStyle: React.CSSProperties = { fontSize: 14, textTransform: "uppercase", color: 'orange' };
@@ -10,7 +10,7 @@ import { useAppContext } from '../AppContext';
 
 import { Qso } from '../../@types/QsoTypes';
 import CallToolTip from './CallTooltip';
-import { SpotRow } from '../../@types/Spots';
+import { SpotFeed, SpotRow } from '../../@types/Spots';
 
 import './SpotViewer.scss'
 import HuntedCheckbox from './HuntedCheckbox';
@@ -25,6 +25,19 @@ import { checkApiResponse } from '../../util';
 
 // https://mui.com/material-ui/react-table/
 
+function formatDistance(km: number | null): string {
+    if (km === null || km === undefined)
+        return '';
+
+    // default to yes
+    let units = window.localStorage.getItem("USE_FREEDOM_UNITS") || '1';
+    let use_imperial = parseInt(units);
+
+    if (use_imperial)
+        return `${Math.trunc(km * 0.621371)} mi`;
+    return `${km} km`;
+}
+
 
 const columns: GridColDef[] = [
     // { field: 'spotId', headerName: 'ID', width: 70 },
@@ -57,6 +70,16 @@ const columns: GridColDef[] = [
         }
     },
     { field: 'mode', headerName: 'Mode', width: 100 },
+    {
+        field: 'distance', headerName: 'Dist', width: 100, type: 'number',
+        renderCell: (x) => {
+            return (
+                <span title={x.row.bearing !== null ? `${x.row.bearing}°` : ''}>
+                    {formatDistance(x.row.distance)}
+                </span>
+            );
+        }
+    },
     {
         field: 'locationDesc', headerName: 'Loc', width: 150,
         renderCell: (x) => {
@@ -151,19 +174,39 @@ export default function SpotViewer() {
     const [backdropOpen, setBackdropOpen] = React.useState(false);
     const { contextData, setData } = useAppContext();
 
+    // the spot feed revision we have. the backend only sends the spots that
+    // changed since this revision
+    const spotRev = React.useRef(0);
+
     function getSpots() {
         // get the spots from the db
         // NOTE: this gets called from the python backend on a timer and when
         // a qso is logged
         setBackdropOpen(true);
-        const spots = window.pywebview.api.get_spots()
+        const spots = window.pywebview.api.get_spots_since(spotRev.current)
         spots.then((r: string) => {
-            var x = JSON.parse(r);
-            setSpots(x);
+            var x = JSON.parse(r) as SpotFeed;
+            if (x.full) {
+                setSpots(x.spots);
+            } else if (x.base != spotRev.current) {
+                // we missed a revision. start over with all the spots
+                spotRev.current = 0;
+                getSpots();
+                return;
+            } else if (x.spots.length > 0 || x.removed.length > 0) {
+                setSpots((curr) => applySpotFeed(curr, x));
+            }
+            spotRev.current = x.rev;
             setBackdropOpen(false);
         });
     }
 
+    function applySpotFeed(curr: SpotRow[], feed: SpotFeed): SpotRow[] {
+        const gone = new Set<number>(feed.removed);
+        feed.spots.forEach((s) => gone.add(s.spotId));
+        return curr.filter((s) => !gone.has(s.spotId)).concat(feed.spots);
+    }
+
     // when [spots] are set, update regions
     React.useEffect(() => {
         // the backend will parse out the regions for pota and sota (US, CA, W7)
@@ -12,11 +12,52 @@ import logging as L
 logging = L.getLogger(__name__)
 
 
+class CompiledAlert:
+    '''
+    An alert turned into a predicate that is checked against spots in memory.
+    It mirrors the sql filter the alert used to be run as.
+    '''
+
+    def __init__(self, alert: Alerts):
+        self.id = alert.id
+        self.key = f"{alert.name}+{alert.id}"
+        # sqlite LIKE is case insensitive
+        self.loc_search = None if alert.loc_search is None \
+            else alert.loc_search.lower()
+        self.new_only = bool(alert.new_only)
+        self.exclude_modes = frozenset()
+        if alert.exclude_modes:
+            self.exclude_modes = frozenset(
+                map(str.strip, alert.exclude_modes.split(',')))
+        # the db stores timestamps without a timezone
+        self.dismissed_until = None if alert.dismissed_until is None \
+            else alert.dismissed_until.replace(tzinfo=None)
+
+    def matches(self, spot: Spot) -> bool:
+        loc = spot.locationDesc
+        if self.loc_search is None or loc is None \
+                or not loc.lower().startswith(self.loc_search):
+            return False
+        if spot.is_qrt is None or spot.is_qrt:
+            return False
+        if self.new_only and spot.park_hunts != 0:
+            return False
+        if self.exclude_modes and \
+                (spot.mode is None or spot.mode in self.exclude_modes):
+            return False
+        if self.dismissed_until is not None and \
+                (spot.spotTime is None
+                 or spot.spotTime <= self.dismissed_until):
+            return False
+        return True
+
+
 class AlertsQuery:
     '''Internal DB queries against the Alerts table are stored here.'''
 
     def __init__(self, session: scoped_session):
         self.session = session
+        self._compiled: list[CompiledAlert] = None
 
     def insert_test_alert(self):
         alert = Alerts()
@@ -34,38 +75,52 @@ class AlertsQuery:
             .filter(Alerts.enabled.is_(True)) \
             .all()
 
-    def check_spots(self) -> dict[str, list[Spot]]:
-        alerts = self.get_current_alerts()
-        found = dict[str, Spot]()
-
-        for a in alerts:
-            terms: list[sa.ColumnElement[bool]] = []
-            terms.append(Spot.locationDesc.startswith(a.loc_search))
-            terms.append(Spot.is_qrt.is_(False))
-
-            if a.new_only:
-                terms.append(Spot.park_hunts == 0)
-            if a.exclude_modes:
-                modes: str = a.exclude_modes
-                list_to_exclude = map(str.strip, modes.split(','))
-                terms.append(Spot.mode.not_in(list_to_exclude))
-
-            if (a.dismissed_until is not None):
-                terms.append(Spot.spotTime > a.dismissed_until)
+    def check_spots(self, spots: list[Spot]) -> dict[str, list[Spot]]:
+        '''
+        Checks the given spots against all the enabled alerts in one pass.
+        Only the alerts that matched a spot are returned and have their
+        `last_triggered` time set.
+
+        :param list[Spot] spots: the spots to check. usually only the spots
+            that are new since the last refresh
+        :returns dict of alert key (name+id) to the spots that matched it
+        '''
+        found = dict[str, list[Spot]]()
+        if len(spots) == 0:
+            return found
+
+        compiled = self._get_compiled()
+        triggered = list[int]()
+
+        for a in compiled:
+            s = [x for x in spots if a.matches(x)]
+            if len(s) > 0:
+                found[a.key] = s
+                triggered.append(a.id)
+
+        if len(triggered) > 0:
+            self.session.query(Alerts) \
+                .filter(Alerts.id.in_(triggered)) \
+                .update({Alerts.last_triggered: datetime.now(timezone.utc)})
+            self.session.commit()
 
-            logging.debug(f"terms {terms}")
-            s = self.session.query(Spot) \
-                .filter(sa.and_(*terms)) \
-                .all()
-            found[f"{a.name}+{a.id}"] = s
-
-            if (s is not None):
-                a.last_triggered = datetime.now(timezone.utc)
-
-        self.session.commit()
         logging.debug(found)
         return found
 
+    def invalidate(self):
+        '''
+        Drops the compiled alerts. Call this after any change to the alerts
+        table is committed so the next check recompiles them.
+        '''
+        self._compiled = None
+
+    def _get_compiled(self) -> list[CompiledAlert]:
+        if self._compiled is None:
+            self._compiled = [CompiledAlert(a)
+                              for a in self.get_current_alerts()]
+            logging.debug(f"compiled {len(self._compiled)} alerts")
+        return self._compiled
+
     def delete_alert(self, id: int):
         self.session.query(Alerts) \
             .filter(Alerts.id == id).delete()
@@ -0,0 +1,169 @@
+from datetime import datetime
+import sqlalchemy as sa
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import scoped_session
+
+from db.models.counters import ActivationDay, CallCount, RefBands
+from db.models.qsos import Qso
+
+import logging as L
+
+logging = L.getLogger(__name__)
+
+# rebuilds all the counters from the qsos table. a band bit is 1 << band so
+# the SUM of the DISTINCT bits is the same as or-ing them together.
+REBUILD_SQL = [
+    "DELETE FROM call_counts;",
+    """INSERT INTO call_counts (call, qsos)
+        SELECT call, COUNT(*) FROM qsos
+        WHERE call IS NOT NULL
+        GROUP BY call;""",
+    "DELETE FROM ref_bands;",
+    """INSERT INTO ref_bands (reference, bands)
+        SELECT sig_info,
+            SUM(DISTINCT CASE WHEN band > 0 THEN 1 << band ELSE 0 END)
+        FROM qsos
+        WHERE sig_info IS NOT NULL
+        GROUP BY sig_info;""",
+    "DELETE FROM activation_days;",
+    """INSERT INTO activation_days (call, reference, day, bands, qsos)
+        SELECT call, sig_info, date(time_on),
+            SUM(DISTINCT CASE WHEN band > 0 THEN 1 << band ELSE 0 END),
+            COUNT(*)
+        FROM qsos
+        WHERE call IS NOT NULL AND sig_info IS NOT NULL
+            AND time_on IS NOT NULL
+        GROUP BY call, sig_info, date(time_on);""",
+]
+
+
+def _band_bit(band: int) -> int:
+    return 1 << band if band else 0
+
+
+class CounterQuery:
+    '''
+    Summary counters for the qsos table: QSOs per callsign, bands worked per
+    reference and the days each activation was hunted. They are written
+    through by `add_qsos` whenever QSOs are inserted so reads don't have to
+    scan the qsos table.
+    '''
+
+    def __init__(self, session: scoped_session):
+        self.session = session
+
+    def add_qsos(self, qsos: list[Qso]):
+        '''
+        Adds new QSOs to the counters. Call this in the same transaction as
+        the QSO insert. Does not commit.
+
+        :param list[Qso] qsos: the QSOs that were inserted
+        '''
+        calls = dict[str, int]()
+        refs = dict[str, int]()
+        days = dict[tuple, list[int]]()
+
+        for q in qsos:
+            bit = _band_bit(q.band)
+            if q.call is not None:
+                calls[q.call] = calls.get(q.call, 0) + 1
+            if q.sig_info is not None:
+                refs[q.sig_info] = refs.get(q.sig_info, 0) | bit
+            if q.call is not None and q.sig_info is not None \
+                    and q.time_on is not None:
+                d = days.setdefault((q.call, q.sig_info, q.time_on.date()),
+                                    [0, 0])
+                d[0] |= bit
+                d[1] += 1
+
+        if len(calls) > 0:
+            stmt = insert(CallCount)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[CallCount.call],
+                set_={'qsos': CallCount.qsos + stmt.excluded.qsos})
+            self.session.execute(
+                stmt, [{'call': c, 'qsos': n} for c, n in calls.items()])
+
+        if len(refs) > 0:
+            stmt = insert(RefBands)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[RefBands.reference],
+                set_={'bands': RefBands.bands.op('|')(stmt.excluded.bands)})
+            self.session.execute(
+                stmt, [{'reference': r, 'bands': b} for r, b in refs.items()])
+
+        if len(days) > 0:
+            stmt = insert(ActivationDay)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[ActivationDay.call,
+                                ActivationDay.reference,
+                                ActivationDay.day],
+                set_={
+                    'bands': ActivationDay.bands.op('|')(stmt.excluded.bands),
+                    'qsos': ActivationDay.qsos + stmt.excluded.qsos
+                })
+            self.session.execute(
+                stmt, [{'call': k[0], 'reference': k[1], 'day': k[2],
+                        'bands': v[0], 'qsos': v[1]}
+                       for k, v in days.items()])
+
+    def rebuild(self):
+        '''
+        Recomputes all the counters from the qsos table. Use when the
+        counters have drifted, ex: the qsos table was edited outside the app.
+        '''
+        logging.info("rebuilding qso counters...")
+        for sql in REBUILD_SQL:
+            self.session.execute(sa.text(sql))
+        self.session.commit()
+
+    def get_call_count(self, call: str) -> int:
+        '''
+        :returns the number of QSOs logged with the callsign
+        '''
+        n = self.session.query(CallCount.qsos) \
+            .filter(CallCount.call == call) \
+            .scalar()
+        return n or 0
+
+    def get_call_counts(self, calls: list[str]) -> dict[str, int]:
+        '''
+        :returns dict of callsign to QSO count. every given call is a key
+        '''
+        result = dict.fromkeys(calls, 0)
+        if len(result) == 0:
+            return result
+
+        rows = self.session.query(CallCount.call, CallCount.qsos) \
+            .filter(CallCount.call.in_(list(result))) \
+            .all()
+        result.update(rows)
+        return result
+
+    def get_ref_bands(self, ref: str) -> list[int]:
+        '''
+        :returns the Bands values worked at the reference, lowest first
+        '''
+        mask = self.session.query(RefBands.bands) \
+            .filter(RefBands.reference == ref) \
+            .scalar()
+        if not mask:
+            return []
+        return [b for b in range(mask.bit_length()) if mask & (1 << b)]
+
+    def get_hunted_today(self, call: str, ref: str, band: int) -> bool:
+        '''
+        Checks if the activation was hunted today (UTC) on the band.
+
+        :param int band: the Bands value. None or NOBAND matches any band
+        '''
+        mask = self.session.query(ActivationDay.bands) \
+            .filter(ActivationDay.call == call,
+                    ActivationDay.reference == ref,
+                    ActivationDay.day == datetime.utcnow().date()) \
+            .scalar()
+        if mask is None:
+            return False
+        if not band:
+            return True
+        return bool(mask & (1 << band))
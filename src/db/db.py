@@ -1,12 +1,14 @@
+import json
 import re
 from typing import List
 import logging as L
 import sqlalchemy as sa
-from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import scoped_session, sessionmaker
 
 
 from db.alerts_query import AlertsQuery
+from db.counter_query import CounterQuery
+from db.engine import get_engine
 from db.filters import Filters
 from db.models.qsos import Qso
 from db.models.activators import Activator, ActivatorSchema
@@ -16,19 +18,21 @@ from db.models.user_config import UserConfig, UserConfigSchema
 from db.park_query import ParkQuery
 from db.qso_query import QsoQuery
 from db.loc_query import LocationQuery
+from db.outbox_query import OutboxQuery
 from db.spot_query import SpotQuery
 from sota import SotaApi
 from utils.callsigns import get_basecall
+from utils.distance import Distance
 import upgrades
-
-Base = declarative_base()
+from db.models import activators, alerts, counters, location, outbox, \
+    park_catalog, parks, qsos, spot_comments, spots, user_config
 
 logging = L.getLogger(__name__)
 # show sql
 # L.getLogger('sqlalchemy.engine').setLevel(L.INFO)
 
 
-VER_FROM_ALEMBIC = 'af395801ad41'
+VER_FROM_ALEMBIC = 'c6e1f0a83d52'
 '''
 This value indicates the version of the DB scheme the app is made for.
 
@@ -87,18 +91,23 @@ class InitQuery:
 
 
 class DataBase:
-    def __init__(self):
-        engine = sa.create_engine("sqlite:///spots.db", poolclass=sa.NullPool)
+    def __init__(self, use_spot_store: bool = True):
+        engine = get_engine()
         self.session = scoped_session(sessionmaker(bind=engine))
-        Base.metadata.create_all(engine)
+        for m in [activators, alerts, counters, location, outbox,
+                  park_catalog, parks, qsos, spot_comments, spots,
+                  user_config]:
+            m.Base.metadata.create_all(engine)
 
         self._filters = Filters()
         self._iq = InitQuery(self.session)
         self._lq = LocationQuery(self.session)
-        self._qq = QsoQuery(self.session)
+        self._cq = CounterQuery(self.session)
+        self._qq = QsoQuery(self.session, self._cq)
         self._pq = ParkQuery(self.session)
-        self._sq = SpotQuery(self.session, self.filters)
+        self._sq = SpotQuery(self.session, self.filters, use_spot_store)
         self._aq = AlertsQuery(self.session)
+        self._oq = OutboxQuery(self.session)
 
         # do this FIRST. will upgrade the db to latest schema
         self._iq.init_alembic_ver()
@@ -107,6 +116,27 @@ class DataBase:
         self._iq.init_config()
 
         self.seen_regions = []
+        self._spot_hashes = dict[int, int]()
+        self._new_spot_ids = list[int]()
+
+    @staticmethod
+    def _get_spot_hash(spot_json: dict) -> int:
+        '''
+        Gets a hash of the spot json returned from an api. Used to tell if a
+        spot has changed between refreshes.
+        '''
+        return hash(json.dumps(spot_json, sort_keys=True, default=str))
+
+    def _delete_stale_comments(self):
+        '''
+        Deletes the spot comments for activations that are no longer spotted.
+        Comments for current spots are kept between refreshes.
+        '''
+        sql = """DELETE FROM comments WHERE NOT EXISTS
+                    (SELECT 1 FROM spots
+                     WHERE spots.activator = comments.activator
+                     AND spots.reference = comments.park);"""
+        self.session.execute(sa.text(sql))
 
     def commit_session(self):
         '''
@@ -126,6 +156,14 @@ class DataBase:
     def qsos(self) -> QsoQuery:
         return self._qq
 
+    @property
+    def counters(self) -> CounterQuery:
+        return self._cq
+
+    @property
+    def outbox(self) -> OutboxQuery:
+        return self._oq
+
     @property
     def parks(self) -> ParkQuery:
         return self._pq
@@ -147,104 +185,171 @@ class DataBase:
         return self._aq
 
     def get_spot_metadata(self, to_add: Spot):
-        park = self.parks.get_park(to_add.reference)
-        if park is not None and park.hunts > 0:
-            to_add.park_hunts = park.hunts
-        else:
-            to_add.park_hunts = 0
+        self.get_spots_metadata([to_add])
 
-        count = self.qsos.get_op_qso_count(to_add.activator)
-        to_add.op_hunts = count
+    def get_spots_metadata(self, spots: list[Spot]):
+        '''
+        Fills in the hunt meta data (park_hunts, op_hunts, hunted and
+        hunted_bands) for a list of spots. The lookups are batched so the
+        number of queries doesn't grow with the number of spots.
+
+        :param list[Spot] spots: the spots to update
+        '''
+        if len(spots) == 0:
+            return
 
-        hunted = self.qsos.get_spot_hunted_flag(
-            to_add.activator, to_add.frequency, to_add.reference)
-        bands = self.qsos.get_spot_hunted_bands(
-            to_add.activator, to_add.reference)
+        park_hunts = self.parks.get_park_hunts([s.reference for s in spots])
+        op_hunts = self.qsos.get_op_qso_counts([s.activator for s in spots])
+        todays = self.qsos.get_todays_hunts()
 
-        to_add.hunted = hunted
-        to_add.hunted_bands = bands
+        for s in spots:
+            hunts = todays.get((s.activator, s.reference), [])
+            s.park_hunts = park_hunts[s.reference]
+            s.op_hunts = op_hunts[s.activator]
+            s.hunted = QsoQuery.get_hunted_flag(hunts, s.band)
+            s.hunted_bands = QsoQuery.get_hunted_bands(hunts)
 
     def update_all_spots(self, spots_json, sota_spots):
         '''
         Updates all the spots in the database.
 
-        First will delete all previous spots, read the ones passed in
-        and perform the logic to update meta info about the spots
+        The spots passed in are diffed against the current spots by their id.
+        New spots are inserted, changed spots are updated and spots that are
+        no longer in the api results are deleted. Spots that have not changed
+        since the last refresh are not reloaded. The meta info about all the
+        spots is then updated. The ids of the new spots are kept for
+        `check_alerts`.
+
+        The spot hashes and new ids are only kept once the changes are
+        committed. If this raises, call `reset_spot_cache`.
 
         :param dict spots_json: the dict from the pota api
         :param dict sota_spots: the dict from the sota api
         '''
 
         schema = SpotSchema()
-        self.session.execute(sa.text('DELETE FROM spots;'))
-        self.session.execute(sa.text('DELETE FROM comments;'))
+        existing = {x.spotId: x for x in self.session.query(Spot).all()}
+        seen_ids = set[int]()
 
         # self._sq.insert_test_spot()  # testing code
         # self._aq.insert_test_alert()  # testing alerts
 
         regions = list[str]()
+        to_enrich = list[Spot]()
+        loc_hunts = self._lq.get_all_location_hunts()
+        hashes = dict[int, int]()
+        new_ids = list[int]()
 
         for s in spots_json:
-            to_add: Spot = schema.load(s, session=self.session)
-            to_add.spot_source = 'POTA'
-            self.session.add(to_add)
+            spot_id = s['spotId']
+            seen_ids.add(spot_id)
+            h = DataBase._get_spot_hash(s)
+            to_add = existing.get(spot_id)
+
+            if to_add is None:
+                to_add = schema.load(s, session=self.session)
+                to_add.spot_source = 'POTA'
+                self.session.add(to_add)
+                new_ids.append(spot_id)
+            elif self._spot_hashes.get(spot_id) != h:
+                schema.load(s, session=self.session, instance=to_add)
+
+            if self._spot_hashes.get(spot_id) != h:
+                to_add.is_qrt = False
 
-            # get meta data for this spot
-            self.get_spot_metadata(to_add)
+                if to_add.comments is not None:
+                    if re.match(r'.*qrt.*', to_add.comments.lower()):
+                        to_add.is_qrt = True
+
+            hashes[spot_id] = h
+            to_enrich.append(to_add)
 
             # sometimes locationDesc can be None. see GR-0071
             if to_add.locationDesc is not None \
                     and ',' not in to_add.locationDesc:
-                x, y = self._lq.get_location_hunts(to_add.locationDesc)
+                x, y = loc_hunts.get(to_add.locationDesc.lower(), (0, 0))
                 to_add.loc_hunts = x
                 to_add.loc_total = y
                 regions.append(to_add.locationDesc[0:2])
 
-            to_add.is_qrt = False
-
-            if to_add.comments is not None:
-                if re.match(r'.*qrt.*', to_add.comments.lower()):
-                    to_add.is_qrt = True
-
         if sota_spots is None:
             logging.warning('sota spots object is Null')
-            self.session.commit()
-            return
+            sota_spots = []
 
+        newest_sota = dict[str, any]()
         for sota in sota_spots:
             # the sota spots are returned in a descending spot time order.
-            # where the first spot is the newest.
-            sota_to_add = Spot()
-            sota_to_add.init_from_sota(sota)
+            # where the first spot is the newest. only keep the newest spot
+            # for each activator
+            act = sota['activatorCallsign']
+            if act not in newest_sota:
+                newest_sota[act] = sota
 
             # this is sota association code
-            regions.append(sota_to_add.locationDesc)
-
-            statement = sa.select(Spot) \
-                .filter_by(activator=sota['activatorCallsign']) \
-                .filter_by(spot_source='SOTA') \
-                .order_by(Spot.spotTime.desc())
-            row = self.session.execute(statement).first()
-
-            # if query returns something, dont add the old spot
-            if row:
-                if row[0].spotTime < sota_to_add.spotTime:
-                    # this check is probably not needed. so this'll prob die
-                    logging.debug("removing and replacing old sota spot")
-                    self.session.expunge(row[0])
-                    self.session.add(sota_to_add)
-            else:
-                self.session.add(sota_to_add)
+            regions.append(sota['associationCode'])
 
-            self.get_spot_metadata(sota_to_add)
+        for sota in newest_sota.values():
+            spot_id = sota['id']
+            seen_ids.add(spot_id)
+            h = DataBase._get_spot_hash(sota)
+            sota_to_add = existing.get(spot_id)
 
+            if sota_to_add is None:
+                sota_to_add = Spot()
+                sota_to_add.init_from_sota(sota)
+                self.session.add(sota_to_add)
+                new_ids.append(spot_id)
+            elif self._spot_hashes.get(spot_id) != h:
+                sota_to_add.init_from_sota(sota)
+
+            hashes[spot_id] = h
+            to_enrich.append(sota_to_add)
+
+        # remove the spots that have expired
+        for spot_id, old in existing.items():
+            if spot_id not in seen_ids:
+                self.session.delete(old)
+        self.session.flush()
+        self._delete_stale_comments()
+
+        # get meta data for all the spots at once
+        self.get_spots_metadata(to_enrich)
+        self._set_spot_distances(to_enrich)
         self.session.commit()
+        self._spot_hashes = hashes
+        self._new_spot_ids = new_ids
+        self._sq.refresh_store()
 
         # set regions list to be used by filter front end
         regions = list(set(regions))
         regions.sort()
         self.seen_regions = regions
 
+    def reset_spot_cache(self):
+        '''
+        Rolls back a failed spot update and forgets the spot hashes, so the
+        next update reloads every spot.
+        '''
+        self.session.rollback()
+        self._spot_hashes = dict[int, int]()
+        self._new_spot_ids = list[int]()
+
+    def _set_spot_distances(self, spots: list[Spot]):
+        '''
+        Sets the distance and bearing from the user's grid to each spot.
+        Spots without a grid get None.
+        '''
+        my_grid = self.get_user_config().my_grid6
+        grids = [s.grid6 or s.grid4 for s in spots]
+        if not my_grid:
+            results = [(None, None)] * len(spots)
+        else:
+            results = Distance.distances_bearings(my_grid, grids)
+
+        for s, (dist, brng) in zip(spots, results):
+            s.distance = dist
+            s.bearing = brng
+
     def update_spot(self, spot_id: int, call: str, ref: str):
         logging.info(f"doing single spot update {spot_id}")
         to_mod: Spot = self.spots.get_spot(spot_id)
@@ -259,6 +364,7 @@ class DataBase:
 
         self.get_spot_metadata(to_mod)
         self.session.commit()
+        self._sq.invalidate_store()
 
     def update_activator_stat(self, activator_stat_json) -> int:
         schema = ActivatorSchema()
@@ -368,12 +474,23 @@ class DataBase:
                 s.latitude = summit['latitude']
                 s.longitude = summit['longitude']
                 self.session.commit()
+                self._sq.invalidate_store()
 
         q = Qso()
         q.init_from_spot(s, name)
         return q
 
     def check_alerts(self) -> dict[str, list[Spot]]:
+        '''
+        Checks the spots that were new in the last spot update against the
+        enabled alerts.
+        '''
         logging.debug("checking alerts...")
-        to_alert = self.alerts.check_spots()
+        if len(self._new_spot_ids) == 0:
+            return {}
+
+        new_spots = self.session.query(Spot) \
+            .filter(Spot.spotId.in_(self._new_spot_ids)) \
+            .all()
+        to_alert = self.alerts.check_spots(new_spots)
         return to_alert
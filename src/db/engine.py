@@ -0,0 +1,58 @@
+'''
+The single configured SQLAlchemy engine for the app's SQLite database.
+
+Connections are pooled and kept open. Each new connection is set up with WAL
+journaling and the other pragmas below so the ticker thread can read while
+the UI thread writes.
+'''
+import sqlalchemy as sa
+import logging as L
+
+logging = L.getLogger(__name__)
+
+DB_URL = "sqlite:///spots.db"
+
+PRAGMAS = [
+    "PRAGMA journal_mode=WAL;",
+    "PRAGMA synchronous=NORMAL;",
+    "PRAGMA mmap_size=268435456;",  # 256 MB
+    "PRAGMA cache_size=-16000;",  # 16 MB
+    "PRAGMA temp_store=MEMORY;",
+    "PRAGMA busy_timeout=5000;",  # ms
+]
+
+
+def _set_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for p in PRAGMAS:
+        cursor.execute(p)
+    cursor.close()
+
+
+def create_engine(url: str = DB_URL) -> sa.Engine:
+    '''
+    Creates a pooled engine for the given SQLite database with the app's
+    pragmas applied to every connection.
+
+    :param str url: SQLAlchemy database url
+    '''
+    engine = sa.create_engine(
+        url,
+        poolclass=sa.QueuePool,
+        pool_size=5,
+        max_overflow=5,
+        connect_args={'check_same_thread': False})
+    sa.event.listen(engine, "connect", _set_pragmas)
+    return engine
+
+
+_engine: sa.Engine = None
+
+
+def get_engine() -> sa.Engine:
+    '''Returns the app wide engine, creating it on first use.'''
+    global _engine
+    if _engine is None:
+        logging.debug(f"creating engine for {DB_URL}")
+        _engine = create_engine()
+    return _engine
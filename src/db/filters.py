@@ -2,7 +2,6 @@ import logging as L
 import sqlalchemy as sa
 from bands import Bands
 from db.models.spots import Spot
-from db.qso_query import QsoQuery
 
 logging = L.getLogger(__name__)
 
@@ -66,7 +65,7 @@ class Filters:
         band = Bands(self.band_filter)  # not sure why cast is needed
         if band == Bands.NOBAND:
             return []
-        terms = QsoQuery.get_band_lmt_terms(band, Spot.frequency)
+        terms = [Spot.band == band.value]
         return terms
 
     def _get_region_filters(self) -> list[sa.ColumnElement[bool]]:
@@ -70,6 +70,41 @@ class LocationQuery:
             .count()
         return (hunts, total)
 
+    def get_all_location_hunts(self) -> dict[str, tuple[int, int]]:
+        '''
+        Same as `get_location_hunts` but for every location at once, using
+        one query for the hunted parks and one for the location totals.
+
+        A park counts for each location in its comma separated
+        `locationDesc`.
+
+        :returns dict of lower case location descriptor to a tuple of (hunt
+            count, total park number)
+        '''
+        hunted = self.session.query(Park.reference, Park.locationDesc) \
+            .filter(sa.exists().where(Qso.sig_info == Park.reference)) \
+            .all()
+
+        refs = dict[str, set[str]]()
+        for ref, loc_desc in hunted:
+            if loc_desc is None:
+                continue
+            for d in loc_desc.split(','):
+                refs.setdefault(d.strip().lower(), set()).add(ref)
+
+        totals = self.session.query(Location.descriptor, Location.parks) \
+            .order_by(Location.locationId) \
+            .all()
+
+        result = dict[str, tuple[int, int]]()
+        for desc, total in totals:
+            if desc is None:
+                continue
+            key = desc.lower()
+            if key not in result:
+                result[key] = (len(refs.get(key, ())), total)
+        return result
+
     def clear_locations(self):
         self.session.execute(sa.text("DELETE FROM LOCATIONS;"))
         self.session.commit()
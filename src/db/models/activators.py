@@ -3,13 +3,12 @@ from sqlalchemy.ext.declarative import declarative_base
 from marshmallow_sqlalchemy import SQLAlchemyAutoSchema
 
 Base = declarative_base()
-engine = sa.create_engine("sqlite:///spots.db")
 
 
 class Activator(Base):
     __tablename__ = "activators"
     activator_id = sa.Column(sa.Integer, primary_key=True)
-    callsign = sa.Column(sa.String)
+    callsign = sa.Column(sa.String, index=True)
     name = sa.Column(sa.String)
     qth = sa.Column(sa.String)
     gravatar = sa.Column(sa.String)
@@ -29,6 +28,3 @@ class ActivatorSchema(SQLAlchemyAutoSchema):
     class Meta:
         model = Activator
         load_instance = True
-
-
-Base.metadata.create_all(engine)
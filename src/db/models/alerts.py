@@ -3,7 +3,6 @@ from sqlalchemy.ext.declarative import declarative_base
 from marshmallow_sqlalchemy import SQLAlchemyAutoSchema
 
 Base = declarative_base()
-engine = sa.create_engine("sqlite:///spots.db")
 
 
 class Alerts(Base):
@@ -26,6 +25,3 @@ class AlertsSchema(SQLAlchemyAutoSchema):
     class Meta:
         model = Alerts
         load_instance = True
-
-
-Base.metadata.create_all(engine)
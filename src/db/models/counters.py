@@ -0,0 +1,43 @@
+import sqlalchemy as sa
+from sqlalchemy.ext.declarative import declarative_base
+
+Base = declarative_base()
+
+# summary counters kept up to date from the qsos table as QSOs are written.
+# see CounterQuery. they can always be rebuilt from the qsos table.
+
+
+class CallCount(Base):
+    __tablename__ = "call_counts"
+    # number of QSOs logged with a callsign
+    call = sa.Column(sa.String, primary_key=True)
+    qsos = sa.Column(sa.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return "<call_count({self.call!r}:{self.qsos!r})>".format(self=self)
+
+
+class RefBands(Base):
+    __tablename__ = "ref_bands"
+    # bit n of bands is set when a QSO at the reference was on Bands(n).
+    # NOBAND is never set
+    reference = sa.Column(sa.String, primary_key=True)
+    bands = sa.Column(sa.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return "<ref_bands({self.reference!r}:{self.bands!r})>" \
+            .format(self=self)
+
+
+class ActivationDay(Base):
+    __tablename__ = "activation_days"
+    # one row per activator, reference and UTC day that was hunted
+    call = sa.Column(sa.String, primary_key=True)
+    reference = sa.Column(sa.String, primary_key=True)
+    day = sa.Column(sa.Date, primary_key=True)
+    bands = sa.Column(sa.Integer, nullable=False, default=0)
+    qsos = sa.Column(sa.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return "<activation_day({self.call!r}@{self.reference!r} " \
+            "{self.day!r})>".format(self=self)
@@ -4,7 +4,6 @@ from sqlalchemy.ext.declarative import declarative_base
 from marshmallow_sqlalchemy import SQLAlchemyAutoSchema
 
 Base = declarative_base()
-engine = sa.create_engine("sqlite:///spots.db")
 
 
 class Location(Base):
@@ -12,7 +11,7 @@ class Location(Base):
     # maps to JSON type for a location from https://api.pota.app/locations/
     # location is the next lowest level, above park
     locationId = sa.Column(sa.Integer, primary_key=True)
-    descriptor = sa.Column(sa.String)
+    descriptor = sa.Column(sa.String, index=True)
     name = sa.Column(sa.String)
     latitude = sa.Column(sa.Float)
     longitude = sa.Column(sa.Float)
@@ -32,6 +31,3 @@ class LocationSchema(SQLAlchemyAutoSchema):
         load_instance = True
 
         unknown = ma.EXCLUDE
-
-
-Base.metadata.create_all(engine)
@@ -0,0 +1,24 @@
+import sqlalchemy as sa
+from sqlalchemy.ext.declarative import declarative_base
+
+from db.utc import utcnow
+
+Base = declarative_base()
+
+
+class AdifOutbox(Base):
+    __tablename__ = "adif_outbox"
+    # one row per ADIF message waiting to be sent to the remote logger. the
+    # row is deleted once the message is sent. see AdifSender
+    id = sa.Column(sa.Integer, primary_key=True)
+    msg = sa.Column(sa.String, nullable=False)
+    host = sa.Column(sa.String, nullable=False)
+    port = sa.Column(sa.Integer, nullable=False)
+    sock_type = sa.Column(sa.Integer, nullable=False)  # socket.SOCK_*
+    created = sa.Column(sa.TIMESTAMP, server_default=utcnow())
+    attempts = sa.Column(sa.Integer, nullable=False, default=0)
+    last_error = sa.Column(sa.String)
+
+    def __repr__(self):
+        return "<adif_outbox({self.id!r}:{self.host!r}:{self.port!r} " \
+            "{self.attempts!r})>".format(self=self)
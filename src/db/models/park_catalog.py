@@ -0,0 +1,19 @@
+import sqlalchemy as sa
+from sqlalchemy.ext.declarative import declarative_base
+
+from db.utc import utcnow
+
+Base = declarative_base()
+
+
+class ParkCatalog(Base):
+    __tablename__ = "park_catalog"
+    # one row per POTA location that has had its park list loaded into the
+    # parks table from https://api.pota.app/location/parks/{loc}
+    location = sa.Column(sa.String, primary_key=True)
+    parks = sa.Column(sa.Integer, default=0)
+    updated = sa.Column(sa.TIMESTAMP, server_default=utcnow())
+
+    def __repr__(self):
+        return "<catalog({self.location!r}:{self.updated!r})>" \
+            .format(self=self)
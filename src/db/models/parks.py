@@ -6,13 +6,12 @@ from marshmallow_sqlalchemy import SQLAlchemyAutoSchema
 from db.utc import utcnow
 
 Base = declarative_base()
-engine = sa.create_engine("sqlite:///spots.db")
 
 
 class Park(Base):
     __tablename__ = "parks"
     id = sa.Column(sa.Integer, primary_key=True)
-    reference = sa.Column(sa.String, nullable=False)
+    reference = sa.Column(sa.String, nullable=False, index=True, unique=True)
     name = sa.Column(sa.String)
     grid4 = sa.Column(sa.String(4))
     grid6 = sa.Column(sa.String(6))
@@ -57,6 +56,3 @@ class ParkSchema(SQLAlchemyAutoSchema):
 
         # there's a bunch we don't care about in the JSON from the API
         unknown = ma.EXCLUDE
-
-
-Base.metadata.create_all(engine)
@@ -1,17 +1,22 @@
 import datetime
 import sqlalchemy as sa
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import validates
 from marshmallow_sqlalchemy import SQLAlchemyAutoSchema
 
+from bands import get_freq_band
 from db.models.spots import Spot
 from db.utc import utcnow
 
 Base = declarative_base()
-engine = sa.create_engine("sqlite:///spots.db")
 
 
 class Qso(Base):
     __tablename__ = "qsos"
+    __table_args__ = (
+        sa.Index('ix_qsos_call_sig_info_time_on', 'call', 'sig_info',
+                 'time_on'),
+    )
     qso_id = sa.Column(sa.Integer, primary_key=True, autoincrement=True)
     call = sa.Column(sa.String)
     name = sa.Column(sa.String)
@@ -20,22 +25,29 @@ class Qso(Base):
     rst_recv = sa.Column(sa.String)
     freq = sa.Column(sa.String)
     freq_rx = sa.Column(sa.String)
+    freq_khz = sa.Column(sa.Float, nullable=True)  # set from freq
+    band = sa.Column(sa.Integer, nullable=True, index=True)  # set from freq
     mode = sa.Column(sa.String(15))
     comment = sa.Column(sa.String)
     qso_date = sa.Column(sa.Date)
-    time_on = sa.Column(sa.TIMESTAMP, server_default=utcnow())
+    time_on = sa.Column(sa.TIMESTAMP, server_default=utcnow(), index=True)
     tx_pwr = sa.Column(sa.Integer)
     rx_pwr = sa.Column(sa.Integer)
     gridsquare = sa.Column(sa.String(6))
     distance = sa.Column(sa.Float, nullable=True)
     bearing = sa.Column(sa.Float, nullable=True)
     sig = sa.Column(sa.String)
-    sig_info = sa.Column(sa.String)
+    sig_info = sa.Column(sa.String, index=True)
     # custom app-only data:
     from_app = sa.Column(sa.Boolean, nullable=True)  # true if logged from app
     cnfm_hunt = sa.Column(sa.Boolean, nullable=True)
     # 👆 true confirmed from hunter.csv
 
+    @validates('freq')
+    def validate_freq(self, key, value):
+        self.freq_khz, self.band = get_freq_band(value)
+        return value
+
     def init_from_spot(self, spot: Spot, name: str):
         rst = self.get_default_rst(spot.mode)
         self.call = spot.activator
@@ -83,7 +95,8 @@ class Qso(Base):
 
     def init_from_adif(self, adif: dict):
         '''
-        Init the fields from dictionary of ADIF files. see adif-io in utils.
+        Init the fields from dictionary of ADIF files. see
+        read_adif_records in utils.adif.
 
         The QSO object created is assumed to be a POTA qso.
 
@@ -136,6 +149,3 @@ class QsoSchema(SQLAlchemyAutoSchema):
     class Meta:
         model = Qso
         load_instance = True
-
-
-Base.metadata.create_all(engine)
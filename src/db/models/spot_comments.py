@@ -4,11 +4,13 @@ from marshmallow_sqlalchemy import SQLAlchemyAutoSchema
 
 
 Base = declarative_base()
-engine = sa.create_engine("sqlite:///spots.db")
 
 
 class SpotComment(Base):
     __tablename__ = "comments"
+    __table_args__ = (
+        sa.Index('ix_comments_activator_park', 'activator', 'park'),
+    )
     spotId = sa.Column(sa.Integer, primary_key=True)
     spotTime = sa.Column(sa.DateTime)
     spotter = sa.Column(sa.String)
@@ -29,6 +31,3 @@ class SpotCommentSchema(SQLAlchemyAutoSchema):
     class Meta:
         model = SpotComment
         load_instance = True
-
-
-Base.metadata.create_all(engine)
@@ -2,19 +2,26 @@ from datetime import datetime
 import logging as L
 import sqlalchemy as sa
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import validates
 from marshmallow_sqlalchemy import SQLAlchemyAutoSchema
 
+from bands import get_freq_band
+
 Base = declarative_base()
-engine = sa.create_engine("sqlite:///spots.db")
 
 log = L.getLogger(__name__)
 
 
 class Spot(Base):
     __tablename__ = "spots"
+    __table_args__ = (
+        sa.Index('ix_spots_activator_reference', 'activator', 'reference'),
+    )
     spotId = sa.Column(sa.Integer, primary_key=True)
     activator = sa.Column(sa.String)
     frequency = sa.Column(sa.String)
+    freq_khz = sa.Column(sa.Float, nullable=True)  # set from frequency
+    band = sa.Column(sa.Integer, nullable=True, index=True)  # from frequency
     mode = sa.Column(sa.String(15))
     reference = sa.Column(sa.String(15))
     parkName = sa.Column(sa.String, nullable=True)
@@ -45,6 +52,8 @@ class Spot(Base):
 
     # to be calculated by app
     is_qrt = sa.Column(sa.Boolean, nullable=True)
+    distance = sa.Column(sa.Integer, nullable=True)  # km from my_grid6
+    bearing = sa.Column(sa.Integer, nullable=True)  # degrees from my_grid6
 
     # pulled from spot comments
     act_cmts = sa.Column(sa.String, nullable=True)
@@ -55,6 +64,11 @@ class Spot(Base):
     def __repr__(self):
         return "<spot(id={self.spotId!r})>".format(self=self)
 
+    @validates('frequency')
+    def validate_frequency(self, key, value):
+        self.freq_khz, self.band = get_freq_band(value)
+        return value
+
     def init_from_sota(self, json: any):
         self.spotId = json['id']
         self.activator = json['activatorCallsign']
@@ -97,6 +111,3 @@ class SpotSchema(SQLAlchemyAutoSchema):
     class Meta:
         model = Spot
         load_instance = True
-
-
-Base.metadata.create_all(engine)
@@ -4,7 +4,6 @@ from sqlalchemy.ext.declarative import declarative_base
 from marshmallow_sqlalchemy import SQLAlchemyAutoSchema
 
 Base = declarative_base()
-engine = sa.create_engine("sqlite:///spots.db")
 
 
 class UserConfig(Base):
@@ -27,6 +26,7 @@ class UserConfig(Base):
     rig_if_type = sa.Column(sa.String, default="flrig")
     pos_x = sa.Column(sa.Integer, default=0)
     pos_y = sa.Column(sa.Integer, default=0)
+    rig_poll_ms = sa.Column(sa.Integer, default=1000)  # 0 to not read the rig
 
     class LoggerType(Enum):
         Tcp = 0
@@ -42,6 +42,3 @@ class UserConfigSchema(SQLAlchemyAutoSchema):
     class Meta:
         model = UserConfig
         load_instance = True
-
-
-Base.metadata.create_all(engine)
@@ -0,0 +1,111 @@
+from datetime import datetime, timedelta
+import sqlalchemy as sa
+from sqlalchemy.orm import scoped_session
+
+from db.models.outbox import AdifOutbox
+
+import logging as L
+
+logging = L.getLogger(__name__)
+
+
+class OutboxQuery:
+    '''
+    Queries for the ADIF outbox, the messages waiting to be sent to the
+    remote logger. The sender thread uses these too so every method finishes
+    its own transaction.
+    '''
+
+    def __init__(self, session: scoped_session):
+        self.session = session
+
+    def enqueue(self, msg: str, host: str, port: int, sock_type: int) -> int:
+        '''
+        Adds a message to the end of the outbox and commits.
+
+        :param str msg: the ADIF (or logger command) to send
+        :param int sock_type: socket.SOCK_STREAM or socket.SOCK_DGRAM
+        :returns the id of the queued message
+        '''
+        row = AdifOutbox(msg=msg, host=host, port=port, sock_type=sock_type,
+                         attempts=0)
+        self.session.add(row)
+        self.session.flush()
+        # the sender may delete the row as soon as it's committed
+        id = row.id
+        self.session.commit()
+        return id
+
+    def get_batch(self, limit: int,
+                  skip: set[tuple] = frozenset()) -> list[AdifOutbox]:
+        '''
+        Gets the oldest messages for one destination, so they can be sent
+        together. The destination is the one with the oldest message that
+        isn't skipped. Messages for a destination are never reordered.
+
+        :param int limit: max number of messages
+        :param set skip: (host, port, sock_type) destinations to leave out,
+            ex: loggers that are waiting for a retry
+        '''
+        q = self.session.query(AdifOutbox)
+        for host, port, sock_type in skip:
+            q = q.filter(sa.not_(sa.and_(AdifOutbox.host == host,
+                                         AdifOutbox.port == port,
+                                         AdifOutbox.sock_type == sock_type)))
+        first = q.order_by(AdifOutbox.id).first()
+        if first is None:
+            self.session.commit()
+            return []
+
+        rows = self.session.query(AdifOutbox) \
+            .filter(AdifOutbox.host == first.host,
+                    AdifOutbox.port == first.port,
+                    AdifOutbox.sock_type == first.sock_type) \
+            .order_by(AdifOutbox.id) \
+            .limit(limit) \
+            .all()
+        self.session.expunge_all()
+        self.session.commit()
+        return rows
+
+    def delete(self, ids: list[int]):
+        '''Removes sent messages and commits.'''
+        if len(ids) == 0:
+            return
+        self.session.query(AdifOutbox) \
+            .filter(AdifOutbox.id.in_(ids)) \
+            .delete(synchronize_session=False)
+        self.session.commit()
+
+    def mark_failed(self, ids: list[int], error: str):
+        '''Counts a failed send of the messages and commits.'''
+        if len(ids) == 0:
+            return
+        self.session.query(AdifOutbox) \
+            .filter(AdifOutbox.id.in_(ids)) \
+            .update({AdifOutbox.attempts: AdifOutbox.attempts + 1,
+                     AdifOutbox.last_error: error},
+                    synchronize_session=False)
+        self.session.commit()
+
+    def expire(self, max_attempts: int, max_age: timedelta) -> int:
+        '''
+        Drops the messages that have failed at least max_attempts times and
+        were queued more than max_age ago, then commits. The QSOs are still
+        in the backup ADIF log.
+
+        :returns the number of messages dropped
+        '''
+        cutoff = datetime.utcnow() - max_age
+        n = self.session.query(AdifOutbox) \
+            .filter(AdifOutbox.attempts >= max_attempts,
+                    AdifOutbox.created < cutoff) \
+            .delete(synchronize_session=False)
+        self.session.commit()
+        return n
+
+    def depth(self) -> int:
+        '''Returns the number of messages waiting to be sent.'''
+        n = self.session.query(sa.func.count(AdifOutbox.id)).scalar()
+        self.session.commit()
+        return n
@@ -1,8 +1,16 @@
 import logging
+from datetime import datetime, timedelta
 import sqlalchemy as sa
+from sqlalchemy.dialects.sqlite import insert
 from sqlalchemy.orm import scoped_session
 
 from db.models.parks import Park, ParkSchema
+from db.models.park_catalog import ParkCatalog
+
+
+# number of parks written per INSERT ... ON CONFLICT statement by
+# upsert_park_hunts
+UPSERT_BATCH_SIZE = 5000
 
 
 class ParkQuery:
@@ -14,9 +22,50 @@ class ParkQuery:
             .filter(Park.reference == park) \
             .first()
 
+    def get_park_hunts(self, refs: list[str]) -> dict[str, int]:
+        '''
+        Gets the hunt counts for many parks with one query.
+
+        :param list[str] refs: park references
+        :returns dict of reference to hunt count. every given ref is a key
+        '''
+        result = dict.fromkeys(refs, 0)
+        if len(result) == 0:
+            return result
+
+        rows = self.session.query(Park.reference, sa.func.max(Park.hunts)) \
+            .filter(Park.reference.in_(list(result)),
+                    Park.hunts > 0) \
+            .group_by(Park.reference) \
+            .all()
+        result.update(rows)
+        return result
+
     def get_parks(self) -> list[Park]:
         return self.session.query(Park).all()
 
+    @staticmethod
+    def needs_park_data(park: Park) -> bool:
+        '''
+        True if the park is missing data that only the POTA park api has.
+        Parks from the hunt stats have no name and parks from a location
+        list have no park type, location name or entity name.
+        '''
+        return park.name is None or park.parktypeDesc is None
+
+    def get_unnamed_park_refs(self) -> list[str]:
+        '''
+        Returns the references of the parks that still need the rest of their
+        data from the POTA api: parks that only have hunt data, and hunted
+        parks that were loaded from a location list. Unhunted location list
+        parks are filled in when they are looked at.
+        '''
+        sql = sa.select(Park.reference) \
+            .where(sa.or_(
+                Park.name.is_(None),
+                sa.and_(Park.parktypeDesc.is_(None), Park.hunts > 0)))
+        return self.session.execute(sql).scalars().all()
+
     def insert_parks(self, parks: list[Park]):
         self.session.add_all(parks)
         self.session.commit()
@@ -81,6 +130,16 @@ class ParkQuery:
         if not delay_commit:
             self.session.commit()
 
+    def update_parks_data(self, parks: list[any]):
+        '''
+        Updates the data of many parks in a single transaction.
+
+        :param list parks: list of park json returned from POTA api
+        '''
+        for park in parks:
+            self.update_park_data(park, delay_commit=True)
+        self.session.commit()
+
     def update_summit_data(self, summit: any, delay_commit: bool = False):
         '''
         Update or insert a "park" with info from SOTA api for a summit
@@ -161,12 +220,22 @@ class ParkQuery:
         :param string summit_ref: the summit code of the "park"
         :returns true if a summit "park" was found and updated.
         '''
-        p = self.get_park(summit_ref)
+        return self.inc_ref_hunt(summit_ref)
+
+    def inc_ref_hunt(self, ref: str) -> bool:
+        '''
+        Increment the hunt count of a park already in the db by one. No park
+        data is updated.
+
+        :param string ref: the park or summit reference
+        :returns true if a park was found and updated.
+        '''
+        p = self.get_park(ref)
 
         if p is None:
             return False
 
-        p.hunts += 1
+        p.hunts = (p.hunts or 0) + 1
         self.session.commit()
         return True
 
@@ -202,6 +271,33 @@ class ParkQuery:
         if not delay_commit:
             self.session.commit()
 
+    def upsert_park_hunts(self, hunts: dict[str, int]) -> int:
+        '''
+        Sets the hunts of many parks at once, ex: from the hunter csv. Parks
+        that are not in the db get a row with only the reference and hunts,
+        the rest of their data is filled in later. Like `update_park_hunts`
+        the given value overwrites the current hunts. Does not commit.
+
+        :param dict hunts: park reference to hunt count
+        :returns number of parks written
+        '''
+        if len(hunts) == 0:
+            return 0
+
+        stmt = insert(Park)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Park.reference],
+            set_={
+                'hunts': stmt.excluded.hunts,
+                'last': sa.func.current_timestamp()
+            })
+
+        rows = [{'reference': r, 'hunts': n} for r, n in hunts.items()]
+        for i in range(0, len(rows), UPSERT_BATCH_SIZE):
+            self.session.execute(stmt, rows[i:i + UPSERT_BATCH_SIZE])
+
+        return len(rows)
+
     def get_hunted_parks(self, location: str) -> list[str]:
         '''
         Returns a list of the references of all hunted parks for a given
@@ -212,3 +308,75 @@ class ParkQuery:
             .where(Park.locationDesc.contains(location))
         result = self.session.execute(sql)
         return result.scalars().all()
+
+    def is_catalog_fresh(self, location: str, max_age: timedelta) -> bool:
+        '''
+        Checks if the parks for the location have been loaded into the db
+        within the given amount of time.
+
+        :param str location: the POTA location (ex "US-CA")
+        :param timedelta max_age: how old the loaded parks can be
+        '''
+        cat = self.session.get(ParkCatalog, location)
+        if cat is None or cat.updated is None:
+            return False
+        return datetime.utcnow() - cat.updated < max_age
+
+    def load_location_parks(self, location: str, parks: list[any]) -> int:
+        '''
+        Bulk loads the list of parks for a location (from the POTA location
+        parks endpoint) into the parks table. New parks are inserted, parks
+        that only have hunt data get filled in. Parks that already have their
+        data are left alone.
+
+        :param str location: the POTA location (ex "US-CA")
+        :param list parks: list of park json for the location
+        :returns number of parks inserted or updated
+        '''
+        def get_values(park: any) -> dict:
+            grid = park.get('grid') or ''
+            return {
+                'name': park.get('name'),
+                'grid4': grid[:4],
+                'grid6': grid,
+                'latitude': park.get('latitude'),
+                'longitude': park.get('longitude'),
+                'locationDesc': park.get('locationDesc', location),
+            }
+
+        by_ref = {p['reference']: p for p in parks if p.get('reference')}
+        refs = list(by_ref)
+        existing = dict[str, Park]()
+        size = 500
+        for i in range(0, len(refs), size):
+            rows = self.session.query(Park) \
+                .filter(Park.reference.in_(refs[i:i + size])) \
+                .all()
+            existing.update((x.reference, x) for x in rows)
+
+        to_insert = []
+        count = 0
+        for ref, park in by_ref.items():
+            p = existing.get(ref)
+            if p is None:
+                to_insert.append({'reference': ref, 'hunts': 0,
+                                  **get_values(park)})
+            elif p.name is None:
+                for k, v in get_values(park).items():
+                    setattr(p, k, v)
+                count += 1
+
+        if len(to_insert) > 0:
+            self.session.execute(sa.insert(Park), to_insert)
+            count += len(to_insert)
+
+        cat = self.session.get(ParkCatalog, location)
+        if cat is None:
+            cat = ParkCatalog(location=location)
+            self.session.add(cat)
+        cat.parks = len(by_ref)
+        cat.updated = datetime.utcnow()
+
+        self.session.commit()
+        logging.debug(f"loaded {count} parks for {location}")
+        return count
@@ -1,24 +1,66 @@
 from datetime import datetime
 import logging
-from typing import List
+from typing import Iterator, List
 import sqlalchemy as sa
 from sqlalchemy.orm import scoped_session
 
+from db.counter_query import CounterQuery
 from db.models.qsos import Qso
-from bands import Bands, get_band, bandLimits, bandNames
+from bands import Bands, get_band, get_bands, bandLimits, bandNames
 
 
 class QsoQuery:
     '''Store Queries for the QSO table here.'''
 
-    def __init__(self, session: scoped_session):
+    def __init__(self, session: scoped_session, counters: CounterQuery):
+        '''
+        :param scoped_session session: the db session object
+        :param CounterQuery counters: the QSO counters to update on insert
+        '''
         self.session = session
+        self._cq = counters
 
     def insert_qso(self, qso: Qso, delay_commit: bool = True):
         self.session.add(qso)
+        self._cq.add_qsos([qso])
         if not delay_commit:
             self.session.commit()
 
+    def insert_qsos_bulk(self, qsos: list[Qso]) -> int:
+        '''
+        Inserts many untracked QSOs with a single executemany insert. QSOs
+        that are already in the db, or repeated in the list, with the same
+        call, time_on and sig_info are skipped.
+
+        :param list[Qso] qsos: the QSOs to insert. they are not added to the
+            session
+        :returns the number of QSOs inserted
+        '''
+        if len(qsos) == 0:
+            return 0
+
+        calls = list({q.call for q in qsos})
+        rows = self.session.query(Qso.call, Qso.time_on, Qso.sig_info) \
+            .filter(Qso.call.in_(calls)) \
+            .all()
+        seen = set(tuple(r) for r in rows)
+
+        cols = [c.key for c in Qso.__table__.columns if c.key != 'qso_id']
+        new_qsos = []
+        for q in qsos:
+            key = (q.call, q.time_on, q.sig_info)
+            if key in seen:
+                continue
+            seen.add(key)
+            new_qsos.append(q)
+
+        if len(new_qsos) > 0:
+            rows = [{c: getattr(q, c) for c in cols} for q in new_qsos]
+            self.session.execute(sa.insert(Qso), rows)
+            self._cq.add_qsos(new_qsos)
+        self.session.commit()
+        return len(new_qsos)
+
     def insert_new_qso(self, qso: any) -> int:
         '''
         Logs the QSO passed in from UI.
@@ -75,18 +117,25 @@ class QsoQuery:
         q.from_app = True
         q.cnfm_hunt = False
         self.session.add(q)
+        self._cq.add_qsos([q])
         self.session.commit()
         return q.qso_id
 
     def get_op_qso_count(self, call: str) -> int:
-        return self.session.query(Qso) \
-            .filter(Qso.call == call) \
-            .count()
+        return self._cq.get_call_count(call)
+
+    def get_op_qso_counts(self, calls: list[str]) -> dict[str, int]:
+        '''
+        Batched version of `get_op_qso_count`. Gets the QSO counts for many
+        activators with a single query.
+
+        :param list[str] calls: activator callsigns
+        :returns dict of callsign to QSO count. every given call is a key
+        '''
+        return self._cq.get_call_counts(calls)
 
     def get_activator_hunts(self, callsign: str) -> int:
-        return self.session.query(Qso) \
-            .filter(Qso.call == callsign) \
-            .count()
+        return self._cq.get_call_count(callsign)
 
     def get_qso(self, id: int) -> Qso:
         return self.session.query(Qso).get(id)
@@ -96,6 +145,22 @@ class QsoQuery:
             .filter(Qso.from_app == True).all()   # noqa E712
         return x
 
+    def iter_qsos_from_app(self, batch_size: int = 1000) -> Iterator[Qso]:
+        '''
+        Streams the QSOs logged with the app from the db cursor instead of
+        loading them all at once.
+
+        :param int batch_size: rows fetched from the cursor at a time
+        '''
+        q = self.session.query(Qso) \
+            .filter(Qso.from_app == True) \
+            .order_by(Qso.qso_id) \
+            .yield_per(batch_size)   # noqa E712
+        for qso in q:
+            yield qso
+            # don't keep the written QSOs in the session
+            self.session.expunge(qso)
+
     def get_spot_hunted_flag(self,
                              activator: str,
                              freq: str,
@@ -108,22 +173,10 @@ class QsoQuery:
         :param str ref: the park reference (ex K-7465)
         :returns true if the spot has already been hunted
         '''
-        now = datetime.utcnow()
         band = get_band(freq)
         # logging.debug(f"using band {band} for freq {freq}")
 
-        if band is not None:
-            terms = QsoQuery.get_band_lmt_terms(band, Qso.freq)
-        else:
-            terms = [1 == 1]
-
-        flag = self.session.query(Qso) \
-            .filter(Qso.call == activator,
-                    Qso.time_on > now.date(),
-                    Qso.sig_info == ref,
-                    sa.and_(*terms)) \
-            .count() > 0
-        return flag
+        return self._cq.get_hunted_today(activator, ref, band.value)
 
     def get_spot_hunted_bands(self, activator: str, ref: str) -> str:
         '''
@@ -134,48 +187,84 @@ class QsoQuery:
         :returns list of hunted bands for today
         '''
         now = datetime.utcnow()
-        result = ""
-        hunted_b = []
 
-        qsos = self.session.query(Qso) \
+        freqs = self.session.query(Qso.freq) \
             .filter(Qso.call == activator,
                     Qso.sig_info == ref,
                     Qso.time_on > now.date()) \
             .all()
 
-        for q in qsos:
-            band = get_band(q.freq)
-            if band is None:
-                logging.warn(f"unknown band for freq {q.freq}")
-            else:
-                hunted_b.append(bandNames[band.value])
+        return QsoQuery._get_band_names([f for f, in freqs])
+
+    def get_todays_hunts(self) \
+            -> dict[tuple[str, str], list[tuple[str, int]]]:
+        '''
+        Gets the frequencies and bands of all the QSOs logged today (UTC),
+        grouped by activator and reference. Used to enrich many spots at once.
+
+        :returns dict of (activator, ref) to a list of (freq, band) tuples
+        '''
+        now = datetime.utcnow()
+        result: dict[tuple[str, str], list[tuple[str, int]]] = {}
 
-        result = ",".join(hunted_b)
+        rows = self.session.query(Qso.call, Qso.sig_info, Qso.freq, Qso.band) \
+            .filter(Qso.time_on > now.date()) \
+            .all()
+
+        for call, ref, freq, band in rows:
+            result.setdefault((call, ref), []).append((freq, band))
 
         return result
 
-    def get_ref_hunted_bands(self, ref: str) -> list[Bands]:
+    @staticmethod
+    def get_hunted_flag(hunts: list[tuple[str, int]], band: int) -> bool:
         '''
-        Queries the stored QSO data for all hunted bands for a reference
+        Same logic as `get_spot_hunted_flag` but works on the list of QSOs
+        from `get_todays_hunts`.
 
-        :param str ref: park reference
-        :returns list of hunted bands
+        :param list hunts: (freq, band) of todays QSOs for the activation
+        :param int band: the Bands value of the spot
+        :returns true if the spot has already been hunted on its band
         '''
-        hunted_bands = []
+        if len(hunts) == 0:
+            return False
 
-        qsos = self.session.query(Qso) \
-            .filter(Qso.sig_info == ref) \
-            .all()
+        if band is None or band == Bands.NOBAND.value:
+            return True
 
-        for q in qsos:
-            band = get_band(q.freq)
-            if band is None:
-                logging.warning(f"unknown band for freq {q.freq}")
-            elif band.value not in hunted_bands:
-                logging.debug(f"appending band {band.value}")
-                hunted_bands.append(band.value)
-
-        return hunted_bands
+        return any(b == band for _, b in hunts)
+
+    @staticmethod
+    def get_hunted_bands(hunts: list[tuple[str, int]]) -> str:
+        '''
+        Same logic as `get_spot_hunted_bands` but works on the list of QSOs
+        from `get_todays_hunts`.
+
+        :param list hunts: (freq, band) of todays QSOs for the activation
+        :returns comma separated string of hunted band names
+        '''
+        return QsoQuery._get_band_names([f for f, _ in hunts])
+
+    @staticmethod
+    def _get_band_names(freqs: list[str]) -> str:
+        hunted_b = []
+        for f, band in zip(freqs, get_bands(freqs)):
+            if band == Bands.NOBAND:
+                logging.warning(f"unknown band for freq {f}")
+            else:
+                hunted_b.append(bandNames[band.value])
+
+        return ",".join(hunted_b)
+
+    def get_ref_hunted_bands(self, ref: str) -> list[Bands]:
+        '''
+        Gets all the hunted bands for a reference from the QSO counters.
+        QSOs that are not in a band are not counted.
+
+        :param str ref: park reference
+        :returns list of hunted band values
+        '''
+        return self._cq.get_ref_bands(ref)
 
     @staticmethod
     def get_band_lmt_terms(band: Bands, col: sa.Column) \
@@ -6,7 +6,9 @@ import logging as L
 
 from db.filters import Filters
 from db.models.spot_comments import SpotComment
-from db.models.spots import Spot
+from db.models.spots import Spot, SpotSchema
+from db.serializer import FastSchema
+from db.spot_store import SpotStore
 
 logging = L.getLogger(__name__)
 
@@ -14,19 +16,57 @@ logging = L.getLogger(__name__)
 class SpotQuery:
     def __init__(self,
                  session: scoped_session,
-                 filters: Filters):
+                 filters: Filters,
+                 use_store: bool = True):
         '''
         Ctor for SpotQuery
         :param scoped_session session: the db session object
         :param filters: the Filters object. provides db filtering terms for
                         returning the list of spots
+        :param bool use_store: True to answer `get_spot_rows` from an in
+                        memory `SpotStore` instead of the db
         '''
         self.session = session
         self._flts = filters
+        self._dumper = FastSchema(SpotSchema, many=True)
+        self.store = SpotStore() if use_store else None
 
     def delete_all_spots(self):
         self.session.execute(sa.text('DELETE FROM spots;'))
         self.session.commit()
+        self.invalidate_store()
+
+    def get_spot_rows(self) -> list[dict]:
+        '''
+        Get the filtered spots as serialized rows (see `SpotSchema`). Uses
+        the spot store when it's enabled, otherwise queries the db.
+        '''
+        if self.store is None:
+            return self._dumper.dump(self.get_spots())
+
+        if self.store.is_stale:
+            self.refresh_store()
+        return self.store.query(self._flts)
+
+    def refresh_store(self):
+        '''
+        Reloads the spot store from the spots table. Call after the spots
+        are committed.
+        '''
+        if self.store is None:
+            return
+        spots = self.session.query(Spot) \
+            .order_by(Spot.spotId) \
+            .all()
+        self.store.load(self._dumper.dump(spots))
+
+    def invalidate_store(self):
+        '''
+        Marks the spot store out of date after a change to a spot. It is
+        reloaded on the next read.
+        '''
+        if self.store is not None:
+            self.store.invalidate()
 
     def get_spots(self):
         '''
@@ -77,6 +117,7 @@ class SpotQuery:
         test.hunted = False
         self.session.add(test)
         self.session.commit()
+        self.invalidate_store()
 
         test_cmt = SpotComment()
         test_cmt.activator = 'N9FZ'
@@ -118,3 +159,4 @@ class SpotQuery:
 
         spot.act_cmts = "|".join(act_comments)
         self.session.commit()
+        self.invalidate_store()
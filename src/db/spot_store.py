@@ -0,0 +1,121 @@
+'''
+An in memory copy of the spots table with indexes for the spot filters.
+
+The spots only change when they are refreshed from the apis, but they are
+read every time the frontend asks for them. The store keeps the serialized
+spot rows and answers the filtered spot list without going to the db.
+'''
+from bands import Bands
+from db.filters import Filters
+
+import logging as L
+
+logging = L.getLogger(__name__)
+
+
+class _Snapshot:
+    '''
+    One immutable set of spot rows and their indexes. The store swaps in a
+    new snapshot on refresh so readers never see a half built one.
+    '''
+
+    def __init__(self, rows: list[dict]):
+        self.rows = {r['spotId']: r for r in rows}
+        self.order = {k: i for i, k in enumerate(self.rows)}
+        self.all = frozenset(self.rows)
+        self.by_band = dict[int, set[int]]()
+        self.by_sig = dict[str, set[int]]()
+        # keys are every prefix of the lower case location
+        self.by_loc_prefix = dict[str, set[int]]()
+        self.not_qrt = set[int]()
+        self.not_hunted = set[int]()
+        self.new_parks = set[int]()
+
+        for k, r in self.rows.items():
+            self.by_band.setdefault(r['band'], set()).add(k)
+            self.by_sig.setdefault(r['spot_source'], set()).add(k)
+
+            loc = r['locationDesc']
+            if loc is not None:
+                loc = loc.lower()
+                for i in range(len(loc) + 1):
+                    self.by_loc_prefix.setdefault(loc[:i], set()).add(k)
+
+            # same as sql: a null value never matches
+            if r['is_qrt'] is False:
+                self.not_qrt.add(k)
+            if r['hunted'] is False:
+                self.not_hunted.add(k)
+            if r['park_hunts'] == 0:
+                self.new_parks.add(k)
+
+
+class SpotStore:
+    '''
+    Holds the current spot snapshot and filters it the same way
+    `SpotQuery.get_spots` does in sql.
+    '''
+
+    def __init__(self):
+        self._snap = _Snapshot([])
+        self.is_stale = True
+
+    def load(self, rows: list[dict]):
+        '''
+        Replaces all the spots in the store.
+
+        :param list[dict] rows: the serialized spot rows. see `SpotSchema`
+        '''
+        snap = _Snapshot(rows)
+        self._snap = snap
+        self.is_stale = False
+        logging.debug(f"spot store loaded {len(snap.rows)} spots")
+
+    def invalidate(self):
+        '''
+        Marks the store out of date. It's reloaded on the next read.
+        '''
+        self.is_stale = True
+
+    def query(self, filters: Filters) -> list[dict]:
+        '''
+        Get the spot rows that pass the filters, in spot id order.
+
+        :param Filters filters: the current spot filters
+        '''
+        snap = self._snap
+        found = [snap.all]
+
+        band = Bands(filters.band_filter)
+        if band != Bands.NOBAND:
+            found.append(snap.by_band.get(band.value, set()))
+
+        if filters.qrt_filter_on:
+            found.append(snap.not_qrt)
+        if filters.hunted_filter_on:
+            found.append(snap.not_hunted)
+        if filters.only_new_on:
+            found.append(snap.new_parks)
+
+        sig = filters.sig_filter
+        if sig is not None and sig != '':
+            found.append(snap.by_sig.get(sig, set()))
+
+        regions = [r.lower() for r in filters.region_filter or [] if len(r)]
+        if len(regions) > 0:
+            in_region = set[int]()
+            for r in regions:
+                in_region |= snap.by_loc_prefix.get(r, set())
+            found.append(in_region)
+
+        found.sort(key=len)
+        result = set(found[0]).intersection(*found[1:])
+
+        loc = filters.location_filter
+        if loc is not None and loc != '':
+            loc = loc.lower()
+            result = {k for k in result
+                      if snap.rows[k]['locationDesc'] is not None
+                      and loc in snap.rows[k]['locationDesc'].lower()}
+
+        return [snap.rows[k] for k in sorted(result, key=snap.order.get)]
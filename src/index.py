@@ -41,6 +41,8 @@ the_api = JsApi()
 parser = argparse.ArgumentParser()
 parser.add_argument("-w", "--reset-win", action="store_true",
                     help="reset the window size and position to default")
+parser.add_argument("-r", "--rebuild-counters", action="store_true",
+                    help="rebuild the QSO counters from the logged QSOs")
 
 
 def do_update():
@@ -154,6 +156,9 @@ if __name__ == '__main__':
         (width, height) = (800, 600)
         (x, y) = (0, 0)
 
+    if args.rebuild_counters:
+        the_api.rebuild_counters()
+
     logging.debug(f"load winow data: {width} x {height} - {maxi}")
 
     webview.settings = {
@@ -0,0 +1,108 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable
+import logging as L
+
+from utils.rate_limit import TokenBucket
+
+logging = L.getLogger(__name__)
+
+HYDRATE_WORKERS = 4
+'''Max number of park requests in flight at once'''
+
+HYDRATE_RATE = 5.0
+'''Max park requests per second sent to the POTA api'''
+
+HYDRATE_BATCH_SIZE = 50
+'''Number of parks saved per db transaction'''
+
+
+class ParkHydrator:
+    '''
+    Bulk fetches park data from the POTA api using a bounded pool of workers
+    and a token bucket rate limit so we stay polite to api.pota.app.
+
+    The fetched parks are handed back in batches on the calling thread so the
+    caller can save them in one transaction per batch. Since only the parks
+    that still need data are passed in, a run that is stopped or interrupted
+    picks up where it left off the next time it is started.
+    '''
+
+    def __init__(self,
+                 fetch: Callable[[str], dict],
+                 workers: int = HYDRATE_WORKERS,
+                 rate: float = HYDRATE_RATE,
+                 batch_size: int = HYDRATE_BATCH_SIZE):
+        '''
+        :param fetch: function that returns the park json for a reference
+        :param int workers: max requests in flight
+        :param float rate: max requests per second
+        :param int batch_size: number of parks passed to each save call
+        '''
+        self.fetch = fetch
+        self.workers = workers
+        self.rate = rate
+        self.batch_size = batch_size
+        self._stop = threading.Event()
+
+    def stop(self):
+        '''Stops a running hydration after the current requests finish.'''
+        self._stop.set()
+
+    def run(self,
+            refs: list[str],
+            save: Callable[[list[dict]], None],
+            progress: Callable[[int, int], None] = None) -> int:
+        '''
+        Fetches the park data for all the given references.
+
+        :param list[str] refs: the park references to fetch
+        :param save: called with each batch of park json to be saved
+        :param progress: called with (done, total) as each park finishes
+        :returns the number of parks fetched and saved
+        '''
+        self._stop.clear()
+        bucket = TokenBucket(self.rate, capacity=self.workers)
+        total = len(refs)
+        done = 0
+        saved = 0
+        batch = []
+
+        def job(ref: str) -> dict:
+            if self._stop.is_set():
+                return None
+            bucket.acquire()
+            try:
+                return self.fetch(ref)
+            except Exception as ex:
+                logging.warning(f"error fetching park {ref}", exc_info=ex)
+                return None
+
+        with ThreadPoolExecutor(max_workers=self.workers,
+                                thread_name_prefix='park_hydrate') as pool:
+            futures = [pool.submit(job, r) for r in refs]
+
+            for f in as_completed(futures):
+                done += 1
+                park = f.result()
+                if park is not None:
+                    batch.append(park)
+
+                if len(batch) >= self.batch_size:
+                    save(batch)
+                    saved += len(batch)
+                    batch = []
+
+                if progress is not None:
+                    progress(done, total)
+
+                if self._stop.is_set():
+                    logging.info("park hydration stopped")
+                    pool.shutdown(wait=True, cancel_futures=True)
+                    break
+
+        if len(batch) > 0:
+            save(batch)
+            saved += len(batch)
+
+        return saved
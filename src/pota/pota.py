@@ -1,11 +1,12 @@
 import json
 import os
+import time
 from pathlib import Path
-import requests
 import logging as L
 import urllib.parse
 from cachetools.func import ttl_cache
 from utils.callsigns import get_basecall
+from utils.http_client import shared_client, NOT_MODIFIED
 from version import __version__
 
 logging = L.getLogger(__name__)
@@ -26,9 +27,18 @@ class Api():
     data_dir = "data"
     '''Directory for stored files'''
 
-    def get_spots(self):
-        '''Return all current spots from POTA API'''
-        response = requests.get(SPOT_URL)
+    def get_spots(self, timeout: float = None):
+        '''
+        Return all current spots from POTA API
+
+        :param float timeout: seconds to wait for the api. None uses the
+            default http timeout
+        :returns: json spots or NOT_MODIFIED if the spots haven't changed
+            since the last call
+        '''
+        response = shared_client.get_if_modified(SPOT_URL, timeout=timeout)
+        if response.status_code == 304:
+            return NOT_MODIFIED
         if response.status_code == 200:
             json = response.json()
             return json
@@ -43,7 +53,7 @@ class Api():
         '''
         quoted = urllib.parse.quote_plus(activator)
         url = SPOT_COMMENTS_URL.format(act=quoted, park=park)
-        response = requests.get(url)
+        response = shared_client.get(url)
         if response.status_code == 200:
             json = response.json()
             return json
@@ -60,7 +70,7 @@ class Api():
         s = get_basecall(activator)
 
         url = ACTIVATOR_URL.format(call=s)
-        response = requests.get(url)
+        response = shared_client.get(url)
         if response.status_code == 200:
             json = response.json()
             return json
@@ -77,7 +87,7 @@ class Api():
         :returns: json activator stats.
         '''
         url = PARK_URL.format(park=park_ref)
-        response = requests.get(url)
+        response = shared_client.get(url)
         if response.status_code == 200:
             json = response.json()
             return json
@@ -118,11 +128,36 @@ class Api():
 
         return Api.save_json(url, file)
 
+    def get_location_parks(self, location: str, max_age: float) -> list:
+        '''
+        Returns the list of all the parks in a location. The park data file
+        for the location is downloaded if missing or older than max_age.
+
+        :param str location: the POTA location string (ex "US-CA")
+        :param float max_age: seconds before the data file is downloaded again
+        :returns: list of park json. None if the download failed
+        '''
+        file = Path(self.data_dir, f"parks-{location}.json")
+
+        if not Path(self.data_dir).exists():
+            Path.mkdir(Path(self.data_dir))
+
+        if not file.exists() or \
+                time.time() - file.stat().st_mtime > max_age:
+            url = LOCATION_PARKS_URL.format(loc=location)
+            code = Api.save_json(url, file)
+            if code != 200 and not file.exists():
+                logging.warning(f"failed to get parks for {location}: {code}")
+                return None
+
+        with open(file, 'r', encoding='utf-8') as r:
+            return json.loads(r.read())
+
     @staticmethod
     def save_json(url: str, file_name: str) -> int:
         '''Request json data from an endpoint and save it to the given file.'''
 
-        r = requests.get(url)
+        r = shared_client.get(url)
         if r.status_code == 200:
             data = r.json()
             with open(file_name, 'w') as out_file:
@@ -136,7 +171,7 @@ class Api():
         This file is quite large
         '''
         url = LOCATIONS_URL
-        response = requests.get(url)
+        response = shared_client.get(url)
         if response.status_code == 200:
             obj = response.json()
             with open('locations.json', 'w', encoding='utf8') as w:
@@ -171,5 +206,5 @@ class Api():
             'comments': spotter_comments
         }
 
-        r = requests.post(url=url, json=json_data, headers=headers)
+        r = shared_client.post(url=url, json=json_data, headers=headers)
         logging.debug(f"code: {r.status_code} : {r.reason}")
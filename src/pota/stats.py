@@ -1,6 +1,14 @@
 import csv
+import json
 import os
 from dataclasses import dataclass
+import logging as L
+
+logging = L.getLogger(__name__)
+
+# parsed csv rows are kept here, keyed by the csv file path, modified time and
+# size. reopening the same export skips parsing the csv
+CACHE_FILE = "pota_stats_cache.json"
 
 
 @dataclass
@@ -9,17 +17,70 @@ class LocationStat:
     activations: int
 
 
+class _CsvCache:
+    '''
+    A small json file of parsed csv rows. An entry is only used while the csv
+    file's modified time and size are the same as when it was parsed.
+    '''
+
+    def __init__(self, cache_file: str):
+        self.cache_file = cache_file
+        self._entries = None
+
+    def get(self, file_n: str, st: os.stat_result) -> list[list]:
+        entry = self._load().get(os.path.abspath(file_n))
+        if entry is None:
+            return None
+        if entry['mtime'] != st.st_mtime_ns or entry['size'] != st.st_size:
+            return None
+        return entry['rows']
+
+    def put(self, file_n: str, st: os.stat_result, rows: list[list]):
+        entries = self._load()
+        entries[os.path.abspath(file_n)] = {
+            'mtime': st.st_mtime_ns,
+            'size': st.st_size,
+            'rows': rows
+        }
+        try:
+            with open(self.cache_file, 'w', encoding='utf-8') as f:
+                json.dump(entries, f)
+        except OSError as ex:
+            logging.warning(f"could not write stats cache {ex}")
+
+    def _load(self) -> dict:
+        if self._entries is not None:
+            return self._entries
+
+        self._entries = {}
+        if os.path.exists(self.cache_file):
+            try:
+                with open(self.cache_file, encoding='utf-8') as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError) as ex:
+                logging.warning(f"ignoring bad stats cache {ex}")
+        return self._entries
+
+
 class PotaStats:
     '''
     This class exposes some POTA statistics calculated from the user's hunter
     and activator csv files.
     '''
 
-    def __init__(self, hunt_file: str, act_file: str = '') -> None:
-        self.activated_parks = []
-        self.hunted_parks = []
+    def __init__(self, hunt_file: str, act_file: str = '',
+                 cache_file: str = CACHE_FILE) -> None:
+        '''
+        :param str hunt_file: the hunter csv export
+        :param str act_file: the activator csv export
+        :param str cache_file: file to cache the parsed csv rows in. None to
+            always parse the csv files
+        '''
+        self.activated_parks = set[str]()
+        self.hunted_parks = set[str]()
         self.loc_stats: dict[str, LocationStat] = {}
         self.hunted_park_stats: dict[str, int] = {}
+        self._cache = _CsvCache(cache_file) if cache_file else None
         self._get_activations_csv(act_file)
         self._get_hunts_csv(hunt_file)
 
@@ -40,10 +101,7 @@ class PotaStats:
 
     def get_park_hunt_count(self, park: str) -> int:
         '''Returns number of hunter QSOs for a given park'''
-        if park in self.hunted_park_stats:
-            return self.hunted_park_stats[park]
-        else:
-            return 0
+        return self.hunted_park_stats.get(park, 0)
 
     def get_actx_count(self, location: str) -> int:
         '''Returns number of activated references in a given location'''
@@ -53,8 +111,12 @@ class PotaStats:
             return 0
 
     def get_all_hunts(self) -> list[str]:
-        '''Returns a list of all the hunted parks'''
-        return self.hunted_parks
+        '''Returns a list of all the hunted parks, in csv order'''
+        return list(self.hunted_park_stats)
+
+    def get_hunted_locations(self) -> list[str]:
+        '''Returns a list of the locations with hunted parks'''
+        return [k for k, v in self.loc_stats.items() if v.hunts > 0]
 
     def _get_activations_csv(self, act_file: str):
         '''
@@ -63,20 +125,9 @@ class PotaStats:
         '''
         file_n = act_file  # "activator_parks.csv"
 
-        if not os.path.exists(file_n):
-            return
-
-        with open(file_n, encoding='utf-8') as csv_file:
-            csv_reader = csv.DictReader(csv_file, delimiter=',')
-            skip_headers = True
-            for row in csv_reader:
-                if skip_headers:
-                    skip_headers = False
-                    continue
-                else:
-                    location = row["HASC"]
-                    self._inc_activations(location)
-                    self.activated_parks.append(row['Reference'])
+        for ref, location in self._read_rows(file_n, ['Reference', 'HASC']):
+            self._inc_activations(location)
+            self.activated_parks.add(ref)
 
     def _get_hunts_csv(self, hunt_file: str):
         '''
@@ -87,22 +138,51 @@ class PotaStats:
         '''
         file_n = hunt_file  # "hunter_parks.csv"
 
-        if not os.path.exists(file_n):
-            return
+        cols = ['Reference', 'HASC', 'QSOs']
+        for park, location, qsos in self._read_rows(file_n, cols):
+            self._inc_hunts(location)
+            self.hunted_parks.add(park)
+            self.hunted_park_stats[park] = PotaStats._to_int(qsos)
 
-        with open(file_n, encoding='utf-8') as csv_file:
-            csv_reader = csv.DictReader(csv_file, delimiter=',')
-            skip_headers = True
+    def _read_rows(self, file_n: str, cols: list[str]) -> list[list[str]]:
+        '''
+        Streams the given columns out of a stats csv file, or gets them from
+        the cache when the file hasn't changed.
+        '''
+        if not os.path.exists(file_n):
+            return []
+
+        st = os.stat(file_n)
+        if self._cache is not None:
+            rows = self._cache.get(file_n, st)
+            if rows is not None:
+                logging.debug(f"using cached rows for {file_n}")
+                return rows
+
+        rows = []
+        with open(file_n, encoding='utf-8', newline='') as csv_file:
+            csv_reader = csv.reader(csv_file, delimiter=',')
+            header = next(csv_reader, [])
+            idx = [header.index(c) for c in cols]
+            # the first row after the header is skipped, same as the
+            # DictReader version of this did
+            next(csv_reader, None)
             for row in csv_reader:
-                if skip_headers:
-                    skip_headers = False
+                if len(row) == 0:
                     continue
-                else:
-                    park = row['Reference']
-                    location = row["HASC"]
-                    self._inc_hunts(location)
-                    self.hunted_parks.append(park)
-                    self.hunted_park_stats[park] = row['QSOs']
+                # DictReader fills short rows with None
+                rows.append([row[i] if i < len(row) else None for i in idx])
+
+        if self._cache is not None:
+            self._cache.put(file_n, st, rows)
+        return rows
+
+    @staticmethod
+    def _to_int(value: str) -> int:
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return 0
 
     def _inc_hunts(self, location: str):
         if location in self.loc_stats:
@@ -1,6 +1,6 @@
-import requests
 import logging as L
 from cachetools.func import ttl_cache
+from utils.http_client import shared_client, NOT_MODIFIED
 # import urllib.parse
 # from utils.callsigns import get_basecall
 
@@ -14,10 +14,19 @@ SUMMIT_URL = "https://api2.sota.org.uk/api/summits/"
 class SotaApi():
     '''Class that calls the POTA endpoints and returns their results'''
 
-    def get_spots(self):
-        '''Return all current spots from POTA API'''
-        response = requests.get(SPOT_URL)
+    def get_spots(self, timeout: float = None):
+        '''
+        Return all current spots from SOTA API
+
+        :param float timeout: seconds to wait for the api. None uses the
+            default http timeout
+        :returns: json spots or NOT_MODIFIED if the spots haven't changed
+            since the last call
+        '''
+        response = shared_client.get_if_modified(SPOT_URL, timeout=timeout)
         logging.debug(response)
+        if response.status_code == 304:
+            return NOT_MODIFIED
         if response.status_code == 200:
             json = response.json()
             return json
@@ -25,7 +34,7 @@ class SotaApi():
     @ttl_cache(ttl=24*60*60)  # 24 hours of cache
     def get_summit(self, summit_ref: str):
         '''Return all current spots from POTA API'''
-        response = requests.get(SUMMIT_URL + summit_ref)
+        response = shared_client.get(SUMMIT_URL + summit_ref)
         if response.status_code == 200:
             json = response.json()
             return json
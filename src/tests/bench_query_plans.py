@@ -0,0 +1,76 @@
+'''
+Times the hot lookups from test_query_plans against a big db. Not part of
+the test run, run it by hand:
+
+    python src/tests/bench_query_plans.py [qsos] [parks]
+
+The db is built in a temp dir with 100k QSOs and 30k parks by default.
+'''
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import engine  # noqa: E402
+from db.db import DataBase  # noqa: E402
+from db.models.parks import Park  # noqa: E402
+from db.models.qsos import Qso  # noqa: E402
+from test_query_plans import LOOKUPS, get_plans  # noqa: E402
+
+RUNS = 200  # calls per lookup
+
+
+def fill(db: DataBase, n_qsos: int, n_parks: int):
+    r = random.Random(1)
+    now = datetime.utcnow()
+    freqs = ['7030', '10110', '14062', '14285', '18100', '21300']
+    parks = [{'reference': f'US-{i:05d}', 'name': f'Park {i}',
+              'hunts': r.randrange(0, 3), 'locationDesc': 'US-CT'}
+             for i in range(n_parks)]
+    qsos = []
+    for _ in range(n_qsos):
+        t = now - timedelta(minutes=r.randrange(0, 60 * 24 * 365))
+        qsos.append({'call': f'K{r.randrange(5000)}AB', 'freq': freqs[
+            r.randrange(len(freqs))], 'mode': 'CW', 'sig': 'POTA',
+            'sig_info': f'US-{r.randrange(n_parks):05d}', 'time_on': t,
+            'qso_date': t.date(), 'from_app': True})
+    db.session.execute(sa.insert(Park), parks)
+    db.session.execute(sa.insert(Qso), qsos)
+    db.session.commit()
+    db.counters.rebuild()
+
+
+def main(n_qsos: int, n_parks: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine._engine = engine.create_engine(
+            f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        db = DataBase()
+        start = time.perf_counter()
+        fill(db, n_qsos, n_parks)
+        print(f"built db with {n_qsos} qsos and {n_parks} parks in "
+              f"{time.perf_counter() - start:.1f}s")
+        db.session.execute(sa.text("ANALYZE;"))
+
+        for name, lookup in LOOKUPS.items():
+            start = time.perf_counter()
+            for _ in range(RUNS):
+                lookup(db)
+                db.session.rollback()
+            ms = (time.perf_counter() - start) / RUNS * 1000
+            plans = "; ".join(p for plan in get_plans(db, lookup)
+                              for p in plan)
+            print(f"{name:20} {ms:7.3f} ms  {plans}")
+
+        db.session.remove()
+        engine._engine.dispose()
+
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:3]]
+    main(*(args + [100_000, 30_000][len(args):]))
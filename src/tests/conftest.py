@@ -0,0 +1,27 @@
+'''
+The app imports its modules from src, ex: `from db.db import DataBase`, so
+src goes on the path for the tests too.
+'''
+import os
+import sys
+
+import pytest
+import sqlalchemy as sa
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def db(monkeypatch):
+    '''A DataBase on a fresh in-memory sqlite db'''
+    from db import engine
+    from db.db import DataBase
+
+    mem = sa.create_engine('sqlite://', poolclass=sa.StaticPool,
+                           connect_args={'check_same_thread': False})
+    monkeypatch.setattr(engine, '_engine', mem)
+    d = DataBase()
+    d.filters.set_sig_filter('')
+    yield d
+    d.session.remove()
+    mem.dispose()
@@ -0,0 +1,48 @@
+import pytest
+
+from utils import adif
+from utils.adif import read_adif_records
+
+RECORDS = '<CALL:4>K1AB <SIG_INFO:7>US-0001 <EOR>\n<CALL:4>W2CD <EOR>\n'
+EXPECTED = [{'CALL': 'K1AB', 'SIG_INFO': 'US-0001'}, {'CALL': 'W2CD'}]
+
+
+def read(tmp_path, text: str) -> list[dict]:
+    f = tmp_path / 'log.adi'
+    f.write_text(text, encoding='utf-8')
+    return list(read_adif_records(str(f)))
+
+
+@pytest.mark.parametrize('prefix', ['', '\ufeff', '\n', '\r\n  \n',
+                                    '\ufeff\n'])
+def test_no_header(tmp_path, prefix):
+    assert read(tmp_path, prefix + RECORDS) == EXPECTED
+
+
+@pytest.mark.parametrize('prefix', ['', '\ufeff', '\n'])
+def test_header(tmp_path, prefix):
+    header = 'exported by a logger\n<ADIF_VER:5>3.1.4 <PROGRAMID:2>xx <EOH>\n'
+    assert read(tmp_path, prefix + header + RECORDS) == EXPECTED
+
+
+def test_header_without_eoh(tmp_path):
+    with pytest.raises(ValueError):
+        read(tmp_path, 'a header\n<ADIF_VER:5>3.1.4\n' + RECORDS)
+
+
+def test_empty(tmp_path):
+    assert read(tmp_path, '') == []
+    assert read(tmp_path, '\n\n') == []
+
+
+def test_markers_in_data(tmp_path):
+    text = '<CALL:4>K1AB <COMMENT:12>hi <eor> <x> <EOR>'
+    assert read(tmp_path, text) == \
+        [{'CALL': 'K1AB', 'COMMENT': 'hi <eor> <x>'}]
+
+
+def test_small_reads(tmp_path, monkeypatch):
+    # tags and values split across reads
+    monkeypatch.setattr(adif, 'READ_SIZE', 3)
+    text = '\n\nheader <EOH>\n' + RECORDS * 3
+    assert read(tmp_path, text) == EXPECTED * 3
@@ -0,0 +1,67 @@
+import socket
+from datetime import timedelta
+
+from utils.adif_sender import AdifSender
+
+UDP = socket.SOCK_DGRAM
+TCP = socket.SOCK_STREAM
+
+
+class FakeUdpSocket:
+    '''Fails on the nth datagram'''
+
+    def __init__(self, fail_on: int):
+        self.fail_on = fail_on
+        self.sent = []
+
+    def sendto(self, data: bytes, addr):
+        if len(self.sent) + 1 == self.fail_on:
+            raise OSError('network is unreachable')
+        self.sent.append(data)
+
+    def close(self):
+        pass
+
+
+def queued(db) -> list[str]:
+    return [r.msg for r in db.outbox.get_batch(100)]
+
+
+def test_udp_partial_failure_keeps_only_unsent(db):
+    for i in range(5):
+        db.outbox.enqueue(f'qso{i}', '127.0.0.1', 2237, UDP)
+    sender = AdifSender(db.outbox)
+    fake = FakeUdpSocket(fail_on=3)
+    sender._sock = fake
+    sender._dest = ('127.0.0.1', 2237, UDP)
+
+    assert sender._send_batch(set()) is None
+    assert fake.sent == [b'qso0', b'qso1']
+    assert queued(db) == ['qso2', 'qso3', 'qso4']
+
+
+def test_dead_destination_does_not_block_others(db):
+    dead = ('127.0.0.1', 1, TCP)
+    db.outbox.enqueue('old', *dead)
+    db.outbox.enqueue('new', '127.0.0.1', 2237, UDP)
+    sender = AdifSender(db.outbox)
+    sender._sock = FakeUdpSocket(fail_on=0)
+    sender._dest = ('127.0.0.1', 2237, UDP)
+
+    assert db.outbox.get_batch(10, {dead})[0].msg == 'new'
+    assert sender._send_batch({dead}) == 1
+    assert sender._send_batch({dead}) == 0
+    assert queued(db) == ['old']
+
+
+def test_expire(db):
+    db.outbox.enqueue('a', '127.0.0.1', 1, TCP)
+    db.outbox.enqueue('b', '127.0.0.1', 1, TCP)
+    rows = db.outbox.get_batch(10)
+    db.outbox.mark_failed([rows[0].id], 'refused')
+
+    assert db.outbox.expire(2, timedelta(0)) == 0
+    db.outbox.mark_failed([rows[0].id], 'refused')
+    assert db.outbox.expire(2, timedelta(days=1)) == 0
+    assert db.outbox.expire(2, timedelta(0)) == 1
+    assert queued(db) == ['b']
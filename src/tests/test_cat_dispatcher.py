@@ -0,0 +1,70 @@
+import threading
+import time
+
+from cat.dispatcher import CatDispatcher
+from cat.icat import ICat
+
+
+class BlockingCat(ICat):
+    '''Records the commands and holds each one until it's released'''
+
+    def __init__(self):
+        self.online = True
+        self.sent = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def init_cat(self, **kwargs):
+        pass
+
+    def set_mode(self, mode: str) -> bool:
+        self.sent.append(('mode', mode))
+        return True
+
+    def set_vfo(self, freq: str) -> bool:
+        self.started.set()
+        self.release.wait(5)
+        self.sent.append(('freq', freq))
+        return True
+
+
+def make_dispatcher(cat: ICat) -> CatDispatcher:
+    return CatDispatcher(cat, heartbeat=60, reconnect_min=60)
+
+
+def test_latest_qsy_wins():
+    cat = BlockingCat()
+    d = make_dispatcher(cat)
+    try:
+        d.qsy('7030000', 'CW')
+        assert cat.started.wait(5)
+
+        # the rig is busy with the first one. these replace each other
+        start = time.monotonic()
+        d.qsy('14062000', 'CW')
+        d.qsy('14285000', 'USB')
+        assert time.monotonic() - start < 0.1
+
+        cat.release.set()
+        assert d.wait_idle(5)
+        assert cat.sent == [('mode', 'CW'), ('freq', '7030000'),
+                            ('mode', 'USB'), ('freq', '14285000')]
+    finally:
+        cat.release.set()
+        d.stop(5)
+
+
+def test_set_vfo_keeps_pending_mode():
+    cat = BlockingCat()
+    d = make_dispatcher(cat)
+    try:
+        d.qsy('7030000', 'CW')
+        assert cat.started.wait(5)
+        d.set_mode('USB')
+        d.set_vfo('14285000')
+        cat.release.set()
+        assert d.wait_idle(5)
+        assert cat.sent[2:] == [('mode', 'USB'), ('freq', '14285000')]
+    finally:
+        cat.release.set()
+        d.stop(5)
@@ -0,0 +1,227 @@
+'''
+Tests the rigctld and flrig interfaces against small fake servers.
+'''
+import socket
+import threading
+import time
+from xmlrpc.server import SimpleXMLRPCServer
+
+import pytest
+
+from cat.flrig import flrig
+from cat.rigctld import rigctld
+
+
+class FakeRigctld:
+    '''
+    Answers f, m, F and M like rigctld. Replies can be sent a few bytes at a
+    time and connections can be dropped after some commands.
+    '''
+
+    def __init__(self):
+        self.freq = '14074123'
+        self.mode = 'USB'
+        self.chunk = 0  # bytes per send. 0 for the whole reply
+        self.drop_after = None  # close a connection after this many cmds
+        self.error = None  # RPRT code to reply to every command with
+        self.cmds = []
+        self.connections = 0
+        self.srv = socket.socket()
+        self.srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.srv.bind(('127.0.0.1', 0))
+        self.srv.listen()
+        self.port = self.srv.getsockname()[1]
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def close(self):
+        try:
+            self.srv.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.srv.close()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self.srv.accept()
+            except OSError:
+                return
+            self.connections += 1
+            threading.Thread(target=self._serve, args=(conn,),
+                             daemon=True).start()
+
+    def _serve(self, conn: socket.socket):
+        buf = b''
+        handled = 0
+        with conn:
+            while self.drop_after is None or handled < self.drop_after:
+                data = conn.recv(1024)
+                if not data:
+                    return
+                buf += data
+                while b'\n' in buf and (self.drop_after is None
+                                        or handled < self.drop_after):
+                    line, buf = buf.split(b'\n', 1)
+                    handled += 1
+                    self._send(conn, self._reply(line.decode().strip()))
+
+    def _reply(self, cmd: str) -> bytes:
+        self.cmds.append(cmd)
+        if self.error is not None:
+            return f'RPRT {self.error}\n'.encode()
+        parts = cmd.split()
+        if parts[0] == 'f':
+            return f'{self.freq}\n'.encode()
+        if parts[0] == 'm':
+            return f'{self.mode}\n2400\n'.encode()
+        if parts[0] == 'F':
+            self.freq = parts[1]
+        elif parts[0] == 'M':
+            self.mode = parts[1]
+        return b'RPRT 0\n'
+
+    def _send(self, conn: socket.socket, reply: bytes):
+        if self.chunk == 0:
+            conn.sendall(reply)
+            return
+        for i in range(0, len(reply), self.chunk):
+            conn.sendall(reply[i:i + self.chunk])
+            time.sleep(0.005)
+
+
+@pytest.fixture
+def fake_rigctld():
+    fake = FakeRigctld()
+    yield fake
+    fake.close()
+
+
+def connect_rigctld(fake: FakeRigctld) -> rigctld:
+    rig = rigctld()
+    rig.init_cat(host='127.0.0.1', port=fake.port)
+    assert rig.online
+    return rig
+
+
+def test_rigctld_split_replies(fake_rigctld):
+    fake_rigctld.chunk = 2
+    rig = connect_rigctld(fake_rigctld)
+
+    # the two line mode reply must not leak into the next reply
+    for _ in range(3):
+        assert rig.get_mode() == 'USB'
+        assert rig.get_vfo() == '14074123'
+    assert rig.set_vfo('7030000')
+    assert rig.get_vfo() == '7030000'
+
+
+def test_rigctld_error_reply(fake_rigctld):
+    rig = connect_rigctld(fake_rigctld)
+    fake_rigctld.error = -11
+
+    # an error is one line, even for the two line mode reply
+    assert rig.get_mode() is None
+    assert rig.get_vfo() is None
+
+    fake_rigctld.error = None
+    assert rig.get_mode() == 'USB'
+    assert rig.get_vfo() == '14074123'
+    assert rig.online
+
+
+def test_rigctld_retries_once_after_drop(fake_rigctld):
+    fake_rigctld.drop_after = 1
+    rig = connect_rigctld(fake_rigctld)
+
+    assert rig.get_vfo() == '14074123'
+    # the server closed that connection. the next command reconnects once
+    assert rig.get_vfo() == '14074123'
+    assert fake_rigctld.connections == 2
+    assert fake_rigctld.cmds == ['f', 'f']
+
+
+def test_rigctld_gives_up_after_one_retry(fake_rigctld):
+    fake_rigctld.drop_after = 1
+    rig = connect_rigctld(fake_rigctld)
+    assert rig.get_vfo() == '14074123'
+
+    # the connection is dropped and rigctld is gone
+    fake_rigctld.close()
+    assert rig.get_vfo() is None
+    assert not rig.online
+    assert fake_rigctld.connections == 1
+
+
+class FakeFlrig:
+    '''The flrig xmlrpc methods hunterlog uses'''
+
+    def __init__(self):
+        self.freq = 14074123.0
+        self.mode = 'USB'
+        self.srv = SimpleXMLRPCServer(('127.0.0.1', 0), logRequests=False,
+                                      allow_none=True)
+        self.port = self.srv.server_address[1]
+        self.srv.register_function(lambda: '2.0.0', 'main.get_version')
+        self.srv.register_function(self.set_frequency, 'rig.set_frequency')
+        self.srv.register_function(self.set_mode, 'rig.set_mode')
+        self.srv.register_function(lambda: f'{self.freq:.0f}',
+                                   'rig.get_vfo')
+        self.srv.register_function(lambda: self.mode, 'rig.get_mode')
+        threading.Thread(target=self.srv.serve_forever, daemon=True).start()
+
+    def set_frequency(self, freq: float):
+        self.freq = freq
+        return None
+
+    def set_mode(self, mode: str):
+        self.mode = mode
+        return None
+
+    def close(self):
+        self.srv.shutdown()
+        self.srv.server_close()
+
+
+@pytest.fixture
+def fake_flrig():
+    fake = FakeFlrig()
+    yield fake
+    fake.close()
+
+
+def test_flrig_reads_and_sets(fake_flrig):
+    rig = flrig()
+    rig.init_cat(host='127.0.0.1', port=fake_flrig.port)
+    assert rig.online
+    assert rig.ping()
+
+    assert rig.get_vfo() == '14074123'
+    assert rig.get_mode() == 'USB'
+    rig.set_vfo('7030000')
+    rig.set_mode('CW')
+    assert fake_flrig.freq == 7030000.0
+    assert fake_flrig.mode == 'CW'
+    assert rig.online
+
+
+def test_flrig_offline_and_reconnect(fake_flrig):
+    rig = flrig()
+    rig.init_cat(host='127.0.0.1', port=fake_flrig.port)
+    port = fake_flrig.port
+    fake_flrig.close()
+
+    assert rig.get_vfo() is None
+    assert not rig.online
+    assert not rig.ping()
+
+    # flrig comes back on the same port
+    srv = SimpleXMLRPCServer(('127.0.0.1', port), logRequests=False)
+    srv.register_function(lambda: '2.0.0', 'main.get_version')
+    srv.register_function(lambda: '7030000', 'rig.get_vfo')
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    try:
+        assert rig.connect()
+        assert rig.get_vfo() == '7030000'
+    finally:
+        srv.shutdown()
+        srv.server_close()
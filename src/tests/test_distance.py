@@ -0,0 +1,35 @@
+import pytest
+
+from utils.distance import Distance
+
+GRIDS = ['FN20', 'FN31pr', 'EM79', 'JO01ab', 'QF56', 'AA00', 'RR99xx', 'IO',
+         'CN87ts', 'PM95']
+
+
+@pytest.mark.parametrize('origin', ['FN31pr', 'JO01', 'QF56od'])
+def test_batch_matches_single(origin):
+    results = Distance.distances_bearings(origin, GRIDS)
+
+    assert len(results) == len(GRIDS)
+    for g, (dist, brng) in zip(GRIDS, results):
+        assert dist == Distance.distance(origin, g)
+        assert brng == Distance.bearing(origin, g)
+
+
+def test_batch_invalid_grids():
+    grids = ['F', 'FN2', 'ZZ99', 'FN20a', '', None, 'FN20xy12zz', 'FN20']
+    results = Distance.distances_bearings('FN31', grids)
+
+    assert results[:-1] == [(None, None)] * (len(grids) - 1)
+    assert results[-1] == (Distance.distance('FN31', 'FN20'),
+                           Distance.bearing('FN31', 'FN20'))
+
+
+def test_batch_invalid_origin():
+    assert Distance.distances_bearings('F', ['FN20', 'EM79']) == \
+        [(None, None), (None, None)]
+
+
+def test_grid_to_latlon_bad_length():
+    assert Distance.grid_to_latlon('F') == (0, 0)
+    assert Distance.grid_to_latlon('FN2') == (0, 0)
@@ -0,0 +1,69 @@
+'''
+Runs the hot lookups through EXPLAIN QUERY PLAN and checks that each of them
+searches an index instead of scanning a table. A SCAN here means a missing
+or unusable index, which is slow on a big log (see the add indexes
+migration).
+'''
+from contextlib import contextmanager
+
+import pytest
+import sqlalchemy as sa
+
+
+@contextmanager
+def capture_selects(engine: sa.Engine):
+    '''Collects the SELECT statements run on the engine'''
+    selects = []
+
+    def on_execute(conn, cursor, statement, params, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            selects.append((statement, params))
+
+    sa.event.listen(engine, 'before_cursor_execute', on_execute)
+    try:
+        yield selects
+    finally:
+        sa.event.remove(engine, 'before_cursor_execute', on_execute)
+
+
+def get_plans(db, lookup) -> list[list[str]]:
+    engine = db.session.get_bind()
+    with capture_selects(engine) as selects:
+        lookup(db)
+
+    assert len(selects) > 0, "the lookup didn't run a query"
+    plans = []
+    with engine.connect() as conn:
+        for statement, params in selects:
+            rows = conn.exec_driver_sql(
+                f"EXPLAIN QUERY PLAN {statement}", params).all()
+            plans.append([r[-1] for r in rows])
+    return plans
+
+
+LOOKUPS = {
+    'qso hunted bands': lambda db:
+        db.qsos.get_spot_hunted_bands('K1AB', 'US-0001'),
+    'qso todays hunts': lambda db: db.qsos.get_todays_hunts(),
+    'qso by id': lambda db: db.qsos.get_qso(1),
+    'call count': lambda db: db.qsos.get_op_qso_count('K1AB'),
+    'call counts': lambda db: db.qsos.get_op_qso_counts(['K1AB', 'W2CD']),
+    'ref bands': lambda db: db.qsos.get_ref_hunted_bands('US-0001'),
+    'hunted today': lambda db:
+        db.qsos.get_spot_hunted_flag('K1AB', '14062', 'US-0001'),
+    'park': lambda db: db.parks.get_park('US-0001'),
+    'park hunts': lambda db: db.parks.get_park_hunts(['US-0001', 'US-0002']),
+    'spot by id': lambda db: db.spots.get_spot(1),
+    'spot by activation': lambda db:
+        db.spots.get_spot_by_actx('K1AB', 'US-0001'),
+    'spot comments': lambda db: db.get_spot_comments('K1AB', 'US-0001'),
+    'activator': lambda db: db.get_activator('K1AB'),
+    'location': lambda db: db.locations.get_location_by_desc('US-CT'),
+}
+
+
+@pytest.mark.parametrize('name', LOOKUPS)
+def test_lookup_uses_index(db, name):
+    for plan in get_plans(db, LOOKUPS[name]):
+        assert not any(p.startswith('SCAN') for p in plan), plan
+        assert any(p.startswith('SEARCH') for p in plan), plan
@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from db.models.spots import Spot
+
+
+def pota_spot(spot_id: int, comments: str = 'hi') -> dict:
+    return {
+        'spotId': spot_id, 'activator': f'K{spot_id}ABC', 'frequency': '14062',
+        'mode': 'CW', 'reference': 'US-0001', 'parkName': 'Park',
+        'spotTime': (datetime.utcnow() - timedelta(minutes=1)).isoformat(),
+        'spotter': 'W1AW', 'comments': comments, 'source': 'Web',
+        'invalid': None, 'name': 'Park', 'locationDesc': 'US-CT',
+        'grid4': 'FN31', 'grid6': 'FN31pr', 'latitude': 41.0,
+        'longitude': -72.0, 'count': 1, 'expire': 600}
+
+
+def get_comments(db) -> dict[int, str]:
+    return {s.spotId: s.comments for s in db.session.query(Spot).all()}
+
+
+def test_update_reloads_changed_spots(db):
+    db.update_all_spots([pota_spot(1), pota_spot(2)], [])
+    db.update_all_spots([pota_spot(1, 'QRT'), pota_spot(3)], [])
+
+    assert get_comments(db) == {1: 'QRT', 3: 'hi'}
+    assert set(db._spot_hashes) == {1, 3}
+    assert db._new_spot_ids == [3]
+
+
+def test_failed_update_is_not_cached(db, monkeypatch):
+    db.update_all_spots([pota_spot(1)], [])
+    hashes = dict(db._spot_hashes)
+
+    def fail(spots):
+        raise RuntimeError('boom')
+
+    monkeypatch.setattr(db, '_set_spot_distances', fail)
+    with pytest.raises(RuntimeError):
+        db.update_all_spots([pota_spot(1, 'QRT'), pota_spot(2)], [])
+
+    # nothing from the failed update is kept until the caller resets
+    assert db._spot_hashes == hashes
+    db.reset_spot_cache()
+    assert db._spot_hashes == {}
+    assert get_comments(db) == {1: 'hi'}
+
+    monkeypatch.undo()
+    db.update_all_spots([pota_spot(1, 'QRT'), pota_spot(2)], [])
+    assert get_comments(db) == {1: 'QRT', 2: 'hi'}
@@ -1,5 +1,5 @@
 import time
-import shutil
+import sqlite3
 from alembic_src import versions
 import logging as L
 
@@ -16,7 +16,14 @@ def do_upgrade():
         logging.info('backing up spots.db')
         timestamp = time.strftime("%Y%m%d-%H%M%S")
         fn = f"spots-{timestamp}.db-back"
-        shutil.copy2("spots.db", fn)
+        # use the backup api so changes still in the WAL file are included
+        src = sqlite3.connect("spots.db")
+        dst = sqlite3.connect(fn)
+        try:
+            src.backup(dst)
+        finally:
+            dst.close()
+            src.close()
     except Exception as ex:
         logging.error("Couldnot back up spots.db", exc_info=ex)
 
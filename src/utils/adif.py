@@ -4,26 +4,261 @@ import logging as L
 import os
 import socket
 import bands
-import adif_io
 import re
+from enum import Enum
+from typing import Callable, Iterable, Iterator
 
 from db.db import DataBase
 from db.models.qsos import Qso
 from db.models.user_config import UserConfig
+from db.outbox_query import OutboxQuery
+from utils.adif_sender import AdifSender
 from version import __version__
 
 logging = L.getLogger(__name__)
 BACKUP_LOG_FN = "hunter.adi"
 
+IMPORT_CHUNK_SIZE = 1000  # qsos per insert statement
+READ_SIZE = 64 * 1024  # chars read from the adif file at a time
+WRITE_BUFFER_SIZE = 64 * 1024  # bytes buffered by AdifWriter
+
+FIELD_RE = re.compile(r"<((eoh)|(eor)|(\w+)\:(\d+)(\:[^>]+)?)>", re.IGNORECASE)
+POTA_REF_RE = re.compile(r'([A-Z0-9]+-[0-9]*)')
+
+
+def read_adif_records(file_name: str) -> Iterator[dict[str, str]]:
+    '''
+    Reads the QSO records from an ADIF file one at a time. The file is read
+    in pieces so memory use does not grow with the size of the file.
+
+    Field names are upper case and all values are strings. Any text before
+    the first tag is a header, which ends at <EOH> and is skipped. Data
+    containing markers like <eor> is handled using the field lengths.
+
+    :param str file_name: path of the ADIF file
+    :returns iterator of dicts, one per QSO record
+    :raises ValueError: if the file has a header with no <EOH>
+    '''
+    # utf-8-sig drops the BOM some loggers write
+    with open(file_name, encoding='utf-8-sig', errors='replace') as f:
+        buf = f.read(READ_SIZE)
+        while buf and buf.isspace():
+            buf = f.read(READ_SIZE)
+        buf = buf.lstrip()
+        eof = len(buf) == 0
+        in_header = not eof and buf[0] != '<'
+        cursor = 0
+        record: dict[str, str] = {}
+
+        while True:
+            m = FIELD_RE.search(buf, cursor)
+            need_more = m is None
+            if m is not None and m.group(4):
+                value_end = m.end(0) + int(m.group(5))
+                need_more = value_end > len(buf)
+
+            if need_more:
+                if eof:
+                    if in_header:
+                        raise ValueError(f"no <EOH> after the header in "
+                                         f"{file_name}")
+                    break
+                if m is None:
+                    # only keep what could be the start of a split tag
+                    tag_start = buf.rfind('<', cursor)
+                    cursor = len(buf) if tag_start < 0 else tag_start
+                more = f.read(READ_SIZE)
+                eof = len(more) == 0
+                buf = buf[cursor:] + more
+                cursor = 0
+                continue
+
+            if m.group(2):
+                in_header = False
+                record = {}
+                cursor = m.end(0)
+            elif m.group(3):
+                if not in_header:
+                    yield record
+                record = {}
+                cursor = m.end(0)
+            else:
+                field = m.group(4).upper()
+                value = buf[m.end(0):value_end]
+                if field in record:
+                    logging.warning(f"duplicate {field} in adif record")
+                else:
+                    record[field] = value
+                cursor = value_end
+
+
+class FsyncPolicy(Enum):
+    NEVER = 0  # leave it to the OS
+    ON_CLOSE = 1  # once when the writer is closed
+    EVERY_RECORD = 2  # after each record. for logs that must not lose a QSO
+
+
+class AdifWriter:
+    '''
+    Appends ADIF records to a file through one buffered handle. Use it as a
+    context manager or call close.
+    '''
+
+    def __init__(self, filename: str,
+                 fsync: FsyncPolicy = FsyncPolicy.ON_CLOSE):
+        '''
+        :param str filename: the file to append to
+        :param FsyncPolicy fsync: when the records are synced to disk
+        '''
+        self.filename = filename
+        self.fsync = fsync
+        self._file = open(filename, "a", encoding='UTF-8',
+                          buffering=WRITE_BUFFER_SIZE)
+
+    def write(self, record: str):
+        self._file.write(record)
+        if self.fsync == FsyncPolicy.EVERY_RECORD:
+            self._sync()
+
+    def write_all(self, records: Iterable[str]) -> int:
+        '''
+        Writes many records with one sync at the end if the policy syncs
+        every record.
+
+        :returns the number of records written
+        '''
+        n = 0
+        for r in records:
+            self._file.write(r)
+            n += 1
+        if self.fsync == FsyncPolicy.EVERY_RECORD:
+            self._sync()
+        return n
+
+    def close(self):
+        if self._file.closed:
+            return
+        if self.fsync != FsyncPolicy.NEVER:
+            self._sync()
+        self._file.close()
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class AdifEncoder:
+    '''
+    Turns a QSO into an ADIF record. The field templates are compiled once
+    into a single function so encoding a QSO is one call with no loop over
+    the fields. See `FastSchema` for the same idea for json.
+    '''
+
+    # ADIF field name and the python expression for its value, in the order
+    # they are written. q is the QSO. a field whose value is None is left out
+    FIELDS = [
+        ("call", "q.call"),
+        ("band", "_band_name(q.freq)"),
+        ("name", "q.name or \'\'"),
+        ("comment", "q.comment"),
+        ("sig", "q.sig"),
+        ("sig_info", "q.sig_info"),
+        ("gridsquare", "q.gridsquare"),
+        ("state", "q.state or \'\'"),
+        ("distance", "str(q.distance)"),
+        ("ant_az", "str(q.bearing)"),
+        ("tx_pwr", "str(q.tx_pwr)"),
+        ("mode", "q.mode"),
+        ("operator", "my_call"),
+        ("rst_rcvd", "q.rst_recv"),
+        ("rst_sent", "q.rst_sent"),
+        ("freq", "str(float(q.freq) / 1000.0)"),
+        ("qso_date", "_adif_date(q.qso_date)"),
+        ("time_on", "_adif_time(q.time_on)"),
+        ("my_gridsquare", "my_grid6"),
+    ]
+
+    def __init__(self):
+        self._encode = AdifEncoder._compile(AdifEncoder.FIELDS)
+
+    def encode(self, qso: Qso, my_call: str, my_grid6: str) -> str:
+        '''
+        :returns the ADIF record ending with <EOR>
+        '''
+        return self._encode(qso, my_call, my_grid6)
+
+    @staticmethod
+    def _compile(fields: list[tuple[str, str]]):
+        items = []
+        for i, (name, expr) in enumerate(fields):
+            v = f"_v{i}"
+            tag = f"<{name.upper()}:"
+            items.append(
+                f"(f\"{tag}{{len({v})}}>{{{v}}}\\n\" "
+                f"if ({v} := {expr}) is not None else \"\")")
+
+        src = "def _encode(q, my_call, my_grid6):\n    return \"\".join((\n" \
+            + "".join(f"        {x},\n" for x in items) \
+            + "        \"<EOR>\\n\"))\n"
+        logging.debug(f"compiled adif encoder\n{src}")
+
+        ns = {
+            '_band_name': _band_name,
+            '_adif_date': _adif_date,
+            '_adif_time': _adif_time,
+        }
+        exec(src, ns)
+        return ns['_encode']
+
+
+def _adif_date(d: datetime.datetime) -> str:
+    # same as strftime('%Y%m%d'), which is slow
+    return "%04d%02d%02d" % (d.year, d.month, d.day)
+
+
+def _adif_time(t: datetime.datetime) -> str:
+    # same as strftime('%H%M%S')
+    return "%02d%02d%02d" % (t.hour, t.minute, t.second)
+
+
+def _band_name(freq: str) -> str:
+    band = bands.get_band(freq)
+    if band == bands.Bands.NOBAND:
+        return None
+    return bands.bandNames[band.value]
+
+
+ADIF_ENCODER = AdifEncoder()
+
 
 class AdifLog():
-    def __init__(self, filename: str = BACKUP_LOG_FN):
+    def __init__(self, filename: str = BACKUP_LOG_FN,
+                 outbox: OutboxQuery = None):
+        '''
+        :param str filename: the backup ADIF log
+        :param OutboxQuery outbox: if given, messages for the remote logger
+            are queued there and sent in the background. otherwise they are
+            sent right away
+        '''
         self.filename = filename
         self._init_adif_log()
+        self._writer: AdifWriter = None
+        self.outbox = outbox
+        self.sender: AdifSender = None
+        if outbox is not None:
+            self.sender = AdifSender(outbox)
+            self.sender.start()
 
     def log_qso_and_send(self, qso: Qso, config: UserConfig):
         '''
-        Logs the QSO the the ADIF file and sends a UDP msg to the remote host.
+        Logs the QSO the the ADIF file and sends a msg to the remote host. The
+        msg is queued in the outbox if there is one.
         '''
         logging.debug(f"logging as {config.logger_type}")
         if config.logger_type == config.LoggerType.Aclog.value:
@@ -40,8 +275,16 @@ class AdifLog():
         elif config.logger_type == config.LoggerType.Tcp.value:
             type = socket.SOCK_STREAM
             adif = self._get_adif(qso, config.my_call, config.my_grid6)
-        self._send_msg(adif, config.adif_host, config.adif_port, type)
         self.write_adif_log(adif)
+        if self.outbox is not None:
+            self.outbox.enqueue(adif, config.adif_host, config.adif_port, type)
+            self.sender.notify()
+        else:
+            self._send_msg(adif, config.adif_host, config.adif_port, type)
+
+    def get_queue_depth(self) -> int:
+        '''Returns the number of msgs waiting to go to the remote host.'''
+        return self.outbox.depth() if self.outbox is not None else 0
 
     def log_qso(self, qso: Qso, config: UserConfig):
         '''
@@ -51,40 +294,91 @@ class AdifLog():
         self.write_adif_log(adif)
 
     def write_adif_log(self, adif):
-        with open(self.filename, "a", encoding='UTF-8') as file:
-            file.write(adif + "\n")
+        # the handle stays open. each QSO is synced to disk since this is
+        # the backup log
+        if self._writer is None:
+            self._writer = AdifWriter(self.filename, FsyncPolicy.EVERY_RECORD)
+        self._writer.write(adif + "\n")
+
+    def write_qsos(self, qsos: Iterable[Qso], config: UserConfig) -> int:
+        '''
+        Writes many QSOs to the ADIF file in one pass, ex: an export. The
+        file is synced once at the end.
+
+        :param qsos: the QSOs, can be a stream from the db
+        :returns the number of QSOs written
+        '''
+        my_call = config.my_call
+        my_grid6 = config.my_grid6
+        with AdifWriter(self.filename, FsyncPolicy.ON_CLOSE) as w:
+            return w.write_all(
+                ADIF_ENCODER.encode(q, my_call, my_grid6) + "\n"
+                for q in qsos)
+
+    def close(self):
+        '''Stops the sender and closes the ADIF file.'''
+        if self.sender is not None:
+            self.sender.stop(1.0)
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
 
     @staticmethod
-    def import_from_log(file_name: str, the_db: DataBase):
+    def import_from_log(file_name: str, the_db: DataBase,
+                        progress: Callable[[int, int], None] = None) -> int:
         '''
         Imports the ADIF records from the given file into the given Database.
 
+        The file is streamed and the QSOs are inserted in chunks. QSOs already
+        in the db (same call, time_on and sig_info) are skipped.
+
         :param str file_name: the path of the ADIF file to import.
         :param DataBase the_db: the instance of the DataBase object to insert
             qso records into.
+        :param progress: called with (records read, qsos inserted) after
+            each chunk is inserted
+        :returns the number of QSOs inserted
         '''
         logging.info(f"importing adif from {file_name}")
-        pattern = r'([A-Z0-9]+-[0-9]*)'
-        if os.path.exists(file_name):
-            qsos, header = adif_io.read_from_file(file_name)
-            logging.debug(f"adif hdr {header}")
-            for qso in qsos:
-                q = Qso()
-                sig_check = ('SIG' in qso.keys() and qso['SIG'] == 'POTA')
-                sig_info_check = ('SIG_INFO' in qso.keys()
-                                  and re.match(pattern, qso["SIG_INFO"]))
-                if (sig_check or sig_info_check):
-                    if not sig_info_check:
-                        # we got pota sig but no sig_info
-                        # check the comments
-                        if 'COMMENT' in qso.keys():
-                            m = re.findall(pattern, qso['COMMENT'])
-                            sig_info = m[0]
-                            qso['SIG_INFO'] = sig_info
-                    q.init_from_adif(qso)
-                    the_db.qsos.insert_qso(q)
-
-            the_db.commit_session()
+        if not os.path.exists(file_name):
+            return 0
+
+        read = 0
+        inserted = 0
+        chunk = []
+
+        def flush():
+            nonlocal inserted, chunk
+            inserted += the_db.qsos.insert_qsos_bulk(chunk)
+            chunk = []
+            if progress is not None:
+                progress(read, inserted)
+
+        for qso in read_adif_records(file_name):
+            read += 1
+            sig_check = qso.get('SIG') == 'POTA'
+            sig_info_check = ('SIG_INFO' in qso
+                              and POTA_REF_RE.match(qso['SIG_INFO']))
+            if not (sig_check or sig_info_check):
+                continue
+
+            if not sig_info_check and 'COMMENT' in qso:
+                # we got pota sig but no sig_info
+                # check the comments
+                m = POTA_REF_RE.search(qso['COMMENT'])
+                if m:
+                    qso['SIG_INFO'] = m.group(1)
+
+            q = Qso()
+            q.init_from_adif(qso)
+            chunk.append(q)
+
+            if len(chunk) >= IMPORT_CHUNK_SIZE:
+                flush()
+
+        flush()
+        logging.info(f"imported {inserted} of {read} adif records")
+        return inserted
 
     def _init_adif_log(self):
         filename = self.filename
@@ -111,45 +405,10 @@ class AdifLog():
                 sock.connect((host, port))
                 sock.send(msg.encode())
         except Exception as err:
-            logging.error("_send_msg exception:", err)
+            logging.error(f"_send_msg exception: {err}")
 
     def _get_adif_field(self, field_name: str, field_data: str) -> str:
         return f"<{field_name.upper()}:{len(field_data)}>{field_data}\n"
 
     def _get_adif(self, qso: Qso, my_call: str, my_grid6: str) -> str:
-        band_name = bands.get_band_name(qso.freq)
-
-        # todo:
-        # self._get_adif_field("distance", qso.sig_info) +
-        # self._get_adif_field("STATE", qso.park_state) +
-
-        # silly but w/e
-        f: float = float(qso.freq) / 1000.0
-        fs = str(f)
-        q_date = qso.qso_date.strftime('%Y%m%d')
-        q_time_on = qso.time_on.strftime('%H%M%S')
-        state = qso.state if qso.state else ''
-
-        adif = \
-            self._get_adif_field("call", qso.call) + \
-            self._get_adif_field("band", band_name) + \
-            self._get_adif_field("name", qso.name if qso.name else '') + \
-            self._get_adif_field("comment", qso.comment) + \
-            self._get_adif_field("sig", qso.sig) + \
-            self._get_adif_field("sig_info", qso.sig_info) + \
-            self._get_adif_field("gridsquare", qso.gridsquare) + \
-            self._get_adif_field("state", state) + \
-            self._get_adif_field("distance", str(qso.distance)) + \
-            self._get_adif_field("ant_az", str(qso.bearing)) + \
-            self._get_adif_field("tx_pwr", str(qso.tx_pwr)) + \
-            self._get_adif_field("mode", qso.mode) + \
-            self._get_adif_field("operator", my_call) + \
-            self._get_adif_field("rst_rcvd", qso.rst_recv) + \
-            self._get_adif_field("rst_sent", qso.rst_sent) + \
-            self._get_adif_field("freq", fs) + \
-            self._get_adif_field("qso_date", q_date) + \
-            self._get_adif_field("time_on", q_time_on) + \
-            self._get_adif_field("my_gridsquare", my_grid6) + \
-            "<EOR>\n"
-
-        return adif
+        return ADIF_ENCODER.encode(qso, my_call, my_grid6)
@@ -0,0 +1,232 @@
+import select
+import socket
+import threading
+import time
+import logging as L
+from datetime import timedelta
+from typing import Optional
+
+from db.models.outbox import AdifOutbox
+from db.outbox_query import OutboxQuery
+
+logging = L.getLogger(__name__)
+
+SEND_BATCH_SIZE = 50
+'''Max queued messages written to the logger at once when catching up'''
+
+RETRY_MIN = 1.0
+'''Seconds before the first retry after a failed send'''
+
+RETRY_MAX = 60.0
+'''Longest wait between retries. The wait doubles after each failure'''
+
+SEND_TIMEOUT = 2.0
+'''Socket timeout in seconds for connecting and sending'''
+
+MAX_ATTEMPTS = 50
+'''Failed sends before a message can be dropped, see MAX_AGE'''
+
+MAX_AGE = timedelta(days=3)
+'''
+Age after which a message that has failed MAX_ATTEMPTS times is dropped, so
+a logger that is never coming back can't grow the outbox forever
+'''
+
+
+class AdifSender:
+    '''
+    Sends the messages in the ADIF outbox to the remote logger on a
+    background thread, oldest first.
+
+    A message stays in the outbox until it has been sent, so nothing is lost
+    if the logger is down or the app is closed. The TCP connection to the
+    logger is kept open between QSOs. After a failure the sender waits with
+    an exponential backoff and then sends everything that piled up, a batch
+    at a time.
+
+    Each destination has its own backoff, so messages for a logger that is
+    down don't hold up messages for another one, ex: after the logger
+    settings were changed. Messages that keep failing for MAX_AGE are
+    dropped.
+
+    Delivery is at least once over TCP: if a write fails partway, the whole
+    batch is sent again and the logger may get some QSOs twice. Each UDP
+    datagram is removed from the outbox as soon as it's sent.
+    '''
+
+    def __init__(self,
+                 outbox: OutboxQuery,
+                 batch_size: int = SEND_BATCH_SIZE,
+                 retry_min: float = RETRY_MIN,
+                 retry_max: float = RETRY_MAX,
+                 timeout: float = SEND_TIMEOUT,
+                 max_attempts: int = MAX_ATTEMPTS,
+                 max_age: timedelta = MAX_AGE):
+        '''
+        :param OutboxQuery outbox: the queued messages
+        :param int batch_size: max messages per write
+        :param float retry_min: first retry wait in seconds
+        :param float retry_max: longest retry wait in seconds
+        :param float timeout: socket timeout in seconds
+        :param int max_attempts: failed sends before a msg can be dropped
+        :param timedelta max_age: age before a failing msg is dropped
+        '''
+        self.outbox = outbox
+        self.batch_size = batch_size
+        self.retry_min = retry_min
+        self.retry_max = retry_max
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.max_age = max_age
+        self.last_error: str = None
+        # destination -> (monotonic time of the next try, next wait)
+        self._retry: dict[tuple, tuple[float, float]] = {}
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread = None
+        self._sock: socket.socket = None
+        self._dest: tuple = None
+
+    def start(self):
+        '''Starts the sender thread. Messages left from last time go first.'''
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name='adif_sender', daemon=True)
+        self._thread.start()
+
+    def notify(self):
+        '''Tells the sender there is a new message in the outbox.'''
+        self._wake.set()
+
+    def stop(self, timeout: float = None):
+        '''Stops the sender. Unsent messages stay in the outbox.'''
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                self._wake.clear()
+                now = time.monotonic()
+                waiting = {d: t for d, (t, _) in self._retry.items()
+                           if t > now}
+                try:
+                    sent = self._send_batch(set(waiting))
+                except Exception as ex:
+                    logging.exception("error reading the adif outbox",
+                                      exc_info=ex)
+                    self._stop.wait(self.retry_min)
+                    continue
+
+                if sent is None:
+                    # that destination waits for its retry. try the others
+                    continue
+                if sent == 0:
+                    # nothing to send until a new QSO or the next retry
+                    timeout = min(waiting.values()) - now if waiting else None
+                    self._wake.wait(timeout)
+        finally:
+            self._close()
+            self.outbox.session.remove()
+
+    def _send_batch(self, skip: set[tuple]) -> Optional[int]:
+        '''
+        Sends the next batch of messages.
+
+        :param set skip: destinations that are waiting for a retry
+        :returns number of messages sent or None if the send failed
+        '''
+        rows = self.outbox.get_batch(self.batch_size, skip)
+        if len(rows) == 0:
+            return 0
+
+        ids = [r.id for r in rows]
+        dest = (rows[0].host, rows[0].port, rows[0].sock_type)
+        sent_ids = list[int]()
+        try:
+            if rows[0].sock_type == socket.SOCK_DGRAM:
+                self._send_udp(rows, sent_ids)
+            else:
+                self._send_tcp(rows)
+        except OSError as ex:
+            self._close()
+            self.last_error = str(ex)
+            # the datagrams that went out before the error are done
+            self.outbox.delete(sent_ids)
+            done = set(sent_ids)
+            failed = [i for i in ids if i not in done]
+            self.outbox.mark_failed(failed, self.last_error)
+            logging.warning(f"error sending {len(failed)} adif msgs to "
+                            f"{rows[0].host}:{rows[0].port}: {ex}")
+            self._retry_later(dest)
+            dropped = self.outbox.expire(self.max_attempts, self.max_age)
+            if dropped > 0:
+                logging.warning(f"dropped {dropped} adif msgs that could "
+                                "not be sent. they are in the backup log")
+            return None
+
+        self._retry.pop(dest, None)
+        self.outbox.delete(ids)
+        self.last_error = None
+        logging.debug(f"sent {len(ids)} adif msgs")
+        return len(ids)
+
+    def _retry_later(self, dest: tuple):
+        '''Schedules the next try for a destination with a backoff.'''
+        _, wait = self._retry.get(dest, (0, self.retry_min))
+        logging.info(f"retrying adif send to {dest[0]}:{dest[1]} in {wait}s")
+        self._retry[dest] = (time.monotonic() + wait,
+                             min(wait * 2, self.retry_max))
+
+    def _send_tcp(self, rows: list[AdifOutbox]):
+        dest = (rows[0].host, rows[0].port, socket.SOCK_STREAM)
+        if self._dest != dest or not self._is_open():
+            self._close()
+            self._sock = socket.create_connection(
+                (rows[0].host, rows[0].port), timeout=self.timeout)
+            self._dest = dest
+            logging.info(f"connected to logger at {dest[0]}:{dest[1]}")
+
+        self._sock.sendall("".join(r.msg for r in rows).encode())
+
+    def _send_udp(self, rows: list[AdifOutbox], sent_ids: list[int]):
+        '''
+        :param list sent_ids: the ids of the msgs sent are added to this
+        '''
+        dest = (rows[0].host, rows[0].port, socket.SOCK_DGRAM)
+        if self._dest != dest:
+            self._close()
+            self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._sock.settimeout(self.timeout)
+            self._dest = dest
+
+        # one datagram per QSO
+        for r in rows:
+            self._sock.sendto(r.msg.encode(), (r.host, r.port))
+            sent_ids.append(r.id)
+
+    def _is_open(self) -> bool:
+        '''
+        Reads and drops any replies from the logger.
+
+        :returns False if the logger closed the connection
+        '''
+        if self._sock is None:
+            return False
+        while select.select([self._sock], [], [], 0)[0]:
+            if len(self._sock.recv(4096)) == 0:
+                return False
+        return True
+
+    def _close(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = None
+        self._dest = None
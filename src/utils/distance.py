@@ -1,8 +1,13 @@
 '''
 This file is basically taken directly from augratin project. thx
 '''
+import re
+from functools import lru_cache
 from math import radians, sin, cos, asin, sqrt, atan2, pi
 
+# field, square, subsquare, extended square
+GRID_RE = re.compile(r"[A-R]{2}(\d{2}([A-X]{2}(\d{2})?)?)?")
+
 
 class Distance:
     @staticmethod
@@ -30,7 +35,7 @@ class Distance:
         maiden = str(maiden).strip().upper()
 
         length = len(maiden)
-        if not 8 >= length >= 2 and length % 2 == 0:
+        if not (2 <= length <= 8 and length % 2 == 0):
             return 0, 0
 
         lon = (ord(maiden[0]) - 65) * 20 - 180
@@ -90,3 +95,68 @@ class Distance:
             brng += 360
 
         return round(brng)
+
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def grid_to_latlon_cached(maiden: str) -> tuple[float, float]:
+        """
+        Same as grid_to_latlon but keeps the decoded grid centres around.
+        """
+        return Distance.grid_to_latlon(maiden)
+
+    @staticmethod
+    def is_valid_grid(maiden: str) -> bool:
+        """
+        True if the string is a 2, 4, 6 or 8 character maidenhead gridsquare
+        """
+        if not maiden:
+            return False
+        return GRID_RE.fullmatch(str(maiden).strip().upper()) is not None
+
+    @staticmethod
+    def distances_bearings(grid: str,
+                           grids: list[str]) -> list[tuple[int, int]]:
+        """
+        Batch version of distance and bearing from one gridsquare to many.
+        The origin is only converted once and the other grids are decoded
+        through the grid cache. Results are the same as the single versions.
+
+        Returns a list of (distance km, bearing) tuples in the same order as
+        grids. Empty, None or invalid grids give (None, None), as do all of
+        them if the origin grid is invalid
+        """
+        if not Distance.is_valid_grid(grid):
+            return [(None, None)] * len(grids)
+
+        lat1, lon1 = Distance.grid_to_latlon_cached(grid)
+        lat1 = radians(lat1)
+        lon1 = radians(lon1)
+        cos_lat1 = cos(lat1)
+        sin_lat1 = sin(lat1)
+        arrgh = 6372.8  # Radius of earth in kilometers.
+
+        result = []
+        for g in grids:
+            if not Distance.is_valid_grid(g):
+                result.append((None, None))
+                continue
+
+            lat2, lon2 = Distance.grid_to_latlon_cached(g)
+            lat2 = radians(lat2)
+            lon2 = radians(lon2)
+            cos_lat2 = cos(lat2)
+            dlon = lon2 - lon1
+            dlat = lat2 - lat1
+
+            aye = sin(dlat / 2) ** 2 + cos_lat1 * cos_lat2 * sin(dlon / 2) ** 2
+            dist = round(2 * asin(sqrt(aye)) * arrgh)
+
+            why = sin(dlon) * cos_lat2
+            exs = cos_lat1 * sin(lat2) - sin_lat1 * cos_lat2 * cos(dlon)
+            brng = atan2(why, exs)
+            brng *= 180 / pi
+            if brng < 0:
+                brng += 360
+
+            result.append((dist, round(brng)))
+        return result
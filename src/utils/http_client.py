@@ -0,0 +1,123 @@
+'''
+A shared http client for the api classes. Keeps pooled keep-alive
+connections to the api hosts so each request doesn't pay for a new TCP and
+TLS handshake.
+
+Import `shared_client` for the app wide instance.
+'''
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+import logging as L
+
+from version import __version__
+
+logging = L.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 15.0  # seconds
+
+NOT_MODIFIED = object()
+'''
+Returned by api methods when a conditional GET says the resource has not
+changed since the last time it was fetched.
+'''
+
+
+class HttpClient:
+    '''
+    Wraps a `requests.Session` with a connection pool, default timeout and
+    ETag/Last-Modified tracking for conditional GETs.
+    '''
+
+    def __init__(self,
+                 timeout: float = DEFAULT_TIMEOUT,
+                 pool_size: int = 10):
+        '''
+        :param float timeout: default seconds to wait for a response
+        :param int pool_size: max connections kept open per host
+        '''
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size,
+                              pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'accept-encoding': 'gzip, deflate',
+            'user-agent': f"hunterlog/{__version__}"
+        })
+        self._validators: dict[str, dict[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, url: str, timeout: float = None,
+            **kwargs) -> requests.Response:
+        '''
+        GET the url using a pooled connection.
+
+        :param str url: the url to request
+        :param float timeout: seconds to wait. None uses the default timeout
+        '''
+        timeout = self.timeout if timeout is None else timeout
+        return self.session.get(url, timeout=timeout, **kwargs)
+
+    def post(self, url: str, timeout: float = None,
+             **kwargs) -> requests.Response:
+        '''
+        POST to the url using a pooled connection.
+
+        :param str url: the url to request
+        :param float timeout: seconds to wait. None uses the default timeout
+        '''
+        timeout = self.timeout if timeout is None else timeout
+        return self.session.post(url, timeout=timeout, **kwargs)
+
+    def get_if_modified(self, url: str,
+                        timeout: float = None) -> requests.Response:
+        '''
+        A conditional GET. Sends the ETag and Last-Modified values from the
+        last 200 response for this url. The response status code will be 304
+        if the resource has not changed.
+
+        :param str url: the url to request
+        :param float timeout: seconds to wait. None uses the default timeout
+        '''
+        headers = {}
+        with self._lock:
+            prev = self._validators.get(url)
+
+        if prev is not None:
+            if 'etag' in prev:
+                headers['If-None-Match'] = prev['etag']
+            if 'last-modified' in prev:
+                headers['If-Modified-Since'] = prev['last-modified']
+
+        response = self.get(url, timeout=timeout, headers=headers)
+
+        if response.status_code == 200:
+            v = {}
+            if 'ETag' in response.headers:
+                v['etag'] = response.headers['ETag']
+            if 'Last-Modified' in response.headers:
+                v['last-modified'] = response.headers['Last-Modified']
+            with self._lock:
+                self._validators[url] = v
+        elif response.status_code == 304:
+            logging.debug(f"not modified: {url}")
+
+        return response
+
+    def clear_validators(self, url: str = None):
+        '''
+        Forget the stored ETag and Last-Modified values. The next conditional
+        GET will return the full resource.
+
+        :param str url: only forget the values for this url. None for all
+        '''
+        with self._lock:
+            if url is None:
+                self._validators.clear()
+            else:
+                self._validators.pop(url, None)
+
+
+shared_client = HttpClient()
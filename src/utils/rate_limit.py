@@ -0,0 +1,39 @@
+import threading
+import time
+
+
+class TokenBucket:
+    '''
+    A thread safe token bucket rate limiter. Tokens are added at `rate` per
+    second up to `capacity`. Each call to `acquire` takes a token, blocking
+    until one is available.
+    '''
+
+    def __init__(self, rate: float, capacity: int = 1):
+        '''
+        :param float rate: tokens added per second
+        :param int capacity: max tokens. this is the largest burst allowed
+        '''
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        '''Take a token from the bucket. Blocks until one is available.'''
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity,
+                    self._tokens + (now - self._last) * self.rate)
+                self._last = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                wait = (1 - self._tokens) / self.rate
+
+            time.sleep(wait)
@@ -0,0 +1,72 @@
+'''
+A versioned delta feed of the spots shown in the frontend. The feed keeps a
+copy of the spots last sent to the frontend and a revision number for it. The
+frontend passes back the revision it has and only gets the spots that were
+added, changed or removed since then.
+'''
+import threading
+import logging as L
+
+logging = L.getLogger(__name__)
+
+
+class SpotFeed:
+    '''
+    Tracks the last spot rows sent to the frontend and diffs new rows against
+    them.
+    '''
+
+    def __init__(self, key: str = 'spotId'):
+        '''
+        :param str key: the field in a spot row that uniquely identifies it
+        '''
+        self.key = key
+        self.rev = 0
+        self._sent: dict[int, dict] = {}
+        self._lock = threading.Lock()
+
+    def get_since(self, rev: int, rows: list[dict]) -> dict:
+        '''
+        Diffs the current spot rows against the rows sent at the given
+        revision.
+
+        If the revision passed in is not the current revision, the client is
+        out of sync and all the rows are returned with `full` set.
+
+        :param int rev: the revision the client currently has. 0 for none
+        :param list[dict] rows: the current (filtered) spot rows
+        :returns dict with `rev`, `base`, `full`, `spots` and `removed` where
+            `spots` is the added or changed rows and `removed` is a list of
+            removed spot keys
+        '''
+        current = {r[self.key]: r for r in rows}
+
+        with self._lock:
+            base = self.rev
+
+            if rev != base or rev == 0:
+                self.rev += 1
+                self._sent = current
+                return self._make(base, True, rows, [])
+
+            changed = [r for k, r in current.items()
+                       if self._sent.get(k) != r]
+            removed = [k for k in self._sent if k not in current]
+
+            if len(changed) > 0 or len(removed) > 0:
+                self.rev += 1
+                self._sent = current
+
+            logging.debug(f"spot feed {base}->{self.rev} "
+                          f"changed {len(changed)} removed {len(removed)}")
+            return self._make(base, False, changed, removed)
+
+    def _make(self, base: int, full: bool, spots: list[dict],
+              removed: list) -> dict:
+        return {
+            'rev': self.rev,
+            'base': base,
+            'full': full,
+            'spots': spots,
+            'removed': removed
+        }